@@ -0,0 +1,38 @@
+"""Regenerate the offline page set in benchmarks/pages.
+
+These pages reproduce the structure of BibleGateway's print interface (site chrome,
+passage container, poetry, headings, footnote/cross-reference markers and lists,
+search-result lists) with placeholder text. Use record_pages.py to replace them with
+real recordings when the site is reachable; the index format is the same.
+"""
+import json
+import os
+
+from standin import PAGES_DIR, passage_page, search_results_page
+
+# (search, translation, file, builder)
+PAGES = [
+    ("Obadiah 1", "KJV", "obadiah_1_KJV.html", lambda: passage_page("Obadiah", 1, translation="KJV")),
+    ("Genesis 1", "KJV", "genesis_1_KJV.html", lambda: passage_page("Genesis", 1, translation="KJV")),
+    ("Psalms 119", "KJV", "psalms_119_KJV.html", lambda: passage_page("Psalms", 119, translation="KJV")),
+    ("Matthew 5", "WEB", "matthew_5_WEB_footnotes.html", lambda: passage_page("Matthew", 5, translation="WEB", notes_every=1)),
+    ("Romans 8", "WEB", "romans_8_WEB_footnotes.html", lambda: passage_page("Romans", 8, translation="WEB", notes_every=2)),
+    ("Genesis 1-5", "KJV", "genesis_1-5_KJV.html", lambda: passage_page("Genesis", 1, 5, translation="KJV")),
+    ("Jn 3", "KJV", "search_jn_3_KJV.html", lambda: search_results_page("Jn 3", "John 3", translation="KJV")),
+]
+
+
+def main():
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    index = {}
+    for search, translation, fname, build in PAGES:
+        with open(os.path.join(PAGES_DIR, fname), "w", encoding="utf-8") as f:
+            f.write(build())
+        index[f"{search}|{translation}"] = fname
+    with open(os.path.join(PAGES_DIR, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    print(f"Wrote {len(index)} pages to {PAGES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Record real print-interface pages from biblegateway.com into benchmarks/pages.
+
+    python benchmarks/record_pages.py "Psalms 119|KJV" "Matthew 5|WEB" ...
+
+Each argument is "search|translation"; with no arguments every page already listed in
+pages/index.json is re-recorded. Be polite: this makes one request per page.
+"""
+import json
+import os
+import re
+import sys
+import time
+
+import requests
+
+from standin import PAGES_DIR
+
+BASE_URL = "https://www.biblegateway.com/passage/"
+
+
+def main(keys):
+    index_path = os.path.join(PAGES_DIR, "index.json")
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    keys = keys or list(index)
+    session = requests.Session()
+    for key in keys:
+        search, translation = key.split("|")
+        resp = session.get(BASE_URL, params={"search": search, "version": translation, "interface": "print"}, timeout=(5, 30))
+        resp.raise_for_status()
+        fname = index.get(key) or re.sub(r"[^A-Za-z0-9]+", "_", f"{search}_{translation}").lower() + ".html"
+        with open(os.path.join(PAGES_DIR, fname), "w", encoding="utf-8") as f:
+            f.write(resp.text)
+        index[key] = fname
+        print(f"Recorded {key} -> {fname} ({len(resp.content)} bytes)")
+        time.sleep(1.5)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
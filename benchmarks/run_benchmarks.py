@@ -0,0 +1,561 @@
+"""Offline benchmark suite for the fetcher.
+
+    python benchmarks/run_benchmarks.py [--latency 0.05] [--label NAME] [--compare results/OLD.json]
+
+Measures parse throughput on the synthetic pages in benchmarks/pages (built by
+make_pages.py, not captured from the site) for every parser backend, then requests per
+book, wall time and peak memory for whole-book and multi-book runs against a local
+stand-in server with the given latency. Parse and extract figures are therefore not
+real-site measurements until record_pages.py replaces the page set. Results are written to
+benchmarks/results/<timestamp>[-label].json so runs can be compared.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import bs4
+
+from standin import PAGES_DIR, StandInServer, passage_page
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bible_archive import ArchiveReader  # noqa: E402
+from bible_batch import BatchScheduler  # noqa: E402
+from bible_cache import ChapterCache, ResponseCache  # noqa: E402
+from bible_compact import CompactPassage  # noqa: E402
+from bible_versification import chapter_count, verse_count  # noqa: E402
+from bible_ratelimit import AdaptiveRateLimiter, TokenBucket  # noqa: E402
+from bible_export import BatchExporter  # noqa: E402
+from bible_verse_fetcher import CANONICAL_BOOKS, HAVE_LXML, BibleGatewayFetcher  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _measure(fn):
+    """Run fn once; returns (result, wall seconds, peak traced bytes)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _backends():
+    parsers = ["html.parser"] + (["lxml"] if HAVE_LXML else [])
+    return [(parser, passage_only) for parser in parsers for passage_only in (False, True)]
+
+
+def bench_parse(min_seconds):
+    with open(os.path.join(PAGES_DIR, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    results = []
+    for key, fname in index.items():
+        search, translation = key.split("|")
+        with open(os.path.join(PAGES_DIR, fname), encoding="utf-8") as f:
+            html = f.read()
+        book, _, span = search.rpartition(" ")
+        first, _, last = span.partition("-")
+        chapters = int(last or first) - int(first) + 1
+        for parser, passage_only in _backends():
+            fetcher = BibleGatewayFetcher(parser=parser, passage_only=passage_only)
+            if fetcher._find_passage(fetcher._parse(html)) is None:
+                break  # not a passage page (e.g. a search-result list)
+            runs = 0
+            started = time.perf_counter()
+            while True:
+                items = fetcher._extract_structured(fetcher._parse(html), book=book, chapter=int(first))
+                runs += 1
+                elapsed = time.perf_counter() - started
+                if elapsed >= min_seconds:
+                    break
+            _, _, peak = _measure(lambda: fetcher._extract_structured(fetcher._parse(html), book=book, chapter=int(first)))
+            results.append({
+                "page": fname, "bytes": len(html.encode("utf-8")), "parser": parser, "passage_only": passage_only,
+                "items": len(items), "ms_per_page": round(elapsed / runs * 1000, 3),
+                "chapters_per_sec": round(runs * chapters / elapsed, 2), "peak_kib": round(peak / 1024, 1),
+            })
+    return results
+
+
+NESTED_NOTES_PAGE = ('<div class="passage-content"><p><span class="text Gen-1-1">In the beginning'
+                     '<span class="footnote">[a]<span class="footnote">[b]</span></span></span></p></div>')
+NESTED_NOTES_ITEMS = [("paragraph", None, None), ("verse", None, "In the beginning [a] [b]"),
+                      ("footnote", "[a][b]", "[a] [b]"), ("footnote", "[b]", "[b]")]
+
+
+def bench_extract(min_seconds, parsers=None):
+    """Item extraction alone (tree already parsed) on long chapters: time, items and JSON size of the result."""
+    pages = [("psalms_119_KJV.html", "Psalms", 119), ("genesis_1-5_KJV.html", "Genesis", 1),
+             ("romans_8_WEB_footnotes.html", "Romans", 8)]
+    sources = []
+    for fname, book, chapter in pages:
+        with open(os.path.join(PAGES_DIR, fname), encoding="utf-8") as f:
+            sources.append((fname, book, chapter, f.read()))
+    sources.append(("stand-in Numbers 7", "Numbers", 7, passage_page("Numbers", 7)))
+    sources.append(("stand-in Psalms 119 notes", "Psalms", 119, passage_page("Psalms", 119, notes_every=3)))
+    results = []
+    for parser in parsers or ["html.parser"] + (["lxml"] if HAVE_LXML else []):
+        # Nested notes without data-symbol: each closes its own item, the outer one keeps the whole text
+        fetcher = BibleGatewayFetcher(parser=parser)
+        nested = fetcher._extract_structured(NESTED_NOTES_PAGE, book="Genesis", chapter=1)
+        assert [(x["type"], x.get("symbol"), x.get("text")) for x in nested] == NESTED_NOTES_ITEMS, (parser, nested)
+    for name, book, chapter, html in sources:
+        for parser in parsers or ["html.parser"] + (["lxml"] if HAVE_LXML else []):
+            fetcher = BibleGatewayFetcher(parser=parser)
+            tree = fetcher._parse(html)
+            runs = 0
+            started = time.perf_counter()
+            while True:
+                items = fetcher._extract_structured(tree, book=book, chapter=chapter)
+                runs += 1
+                elapsed = time.perf_counter() - started
+                if elapsed >= min_seconds:
+                    break
+            results.append({"page": name, "parser": parser, "items": len(items),
+                            "json_kib": round(len(json.dumps(items, ensure_ascii=False).encode("utf-8")) / 1024, 1),
+                            "ms_per_page": round(elapsed / runs * 1000, 3)})
+    return results
+
+
+def bench_books(server, books, chapters_per_request):
+    results = []
+    for book in books:
+        fetcher = BibleGatewayFetcher(delay_between_requests=0)
+        fetcher.BASE_URL = server.base_url
+        hits = server.hits
+        items, elapsed, peak = _measure(lambda: fetcher.fetch_entire_book(book, "KJV", chapters_per_request=chapters_per_request))
+        results.append({
+            "book": book, "chapters_per_request": chapters_per_request, "requests": server.hits - hits,
+            "items": len(items), "wall_s": round(elapsed, 3), "peak_kib": round(peak / 1024, 1),
+            "metrics": fetcher.metrics.totals(),
+        })
+        fetcher.close()
+    return results
+
+
+def bench_batch(server, books, workers, rate, chapters_per_request):
+    fetcher = BibleGatewayFetcher(delay_between_requests=0, rate_limiter=TokenBucket(rate, burst=workers))
+    fetcher.BASE_URL = server.base_url
+    counted = {"items": 0}
+
+    def on_chapter(book, chapter, items):
+        counted["items"] += len(items)
+
+    hits = server.hits
+    scheduler = BatchScheduler(fetcher, books, "KJV", workers=workers, chapters_per_request=chapters_per_request,
+                               on_chapter=on_chapter, keep_books=False)
+    _, elapsed, peak = _measure(scheduler.run)
+    fetcher.close()
+    return {
+        "books": books, "workers": workers, "rate": rate, "chapters_per_request": chapters_per_request,
+        "requests": server.hits - hits, "items": counted["items"], "wall_s": round(elapsed, 3),
+        "peak_kib": round(peak / 1024, 1), "metrics": fetcher.metrics.totals(),
+    }
+
+
+def bench_streaming(server, chapters=(("Genesis", 1, "KJV"), ("Psalms", 119, "KJV"), ("Matthew", 5, "WEB"))):
+    """Time to first verse, total time and peak memory per page: whole-page parse against iter_chapter."""
+    results = []
+    for book, chapter, translation in chapters:
+        row = {"page": f"{book} {chapter} {translation}"}
+        for label, streaming in (("whole", False), ("streaming", True)):
+            fetcher = BibleGatewayFetcher(delay_between_requests=0)
+            fetcher.BASE_URL = server.base_url
+            fetcher.fetch_entire_chapter("Ruth", 1, translation)   # warm connection
+            first = []
+
+            def run():
+                started = time.perf_counter()
+                items = fetcher.iter_chapter(book, chapter, translation) if streaming else \
+                    fetcher.fetch_entire_chapter(book, chapter, translation)
+                count = 0
+                for item in items:
+                    if not first and item["type"] == "verse":
+                        first.append(time.perf_counter() - started)
+                    count += 1
+                return count
+
+            count, elapsed, peak = _measure(run)
+            fetcher.close()
+            row[label] = {"items": count, "first_verse_ms": round(first[0] * 1000, 2), "wall_ms": round(elapsed * 1000, 2),
+                          "peak_kib": round(peak / 1024, 1)}
+        results.append(row)
+    return results
+
+
+def bench_pacing(server, books=("Isaiah", "Jeremiah"), workers=8, guess=10.0):
+    """Multi-book run against a server that answers 429 above its limit: a fixed-rate guess against the adaptive limiter."""
+    results = {"books": list(books), "server_limit": server.max_rate}
+    for label, limiter in (("fixed", TokenBucket(rate=guess, burst=workers)),
+                           ("adaptive", AdaptiveRateLimiter(rate=guess, max_rate=guess * 10, burst=workers, increase=1.0))):
+        fetcher = BibleGatewayFetcher(rate_limiter=limiter, backoff_factor=0.1)
+        fetcher.BASE_URL = server.base_url
+        hits, throttled = server.hits, server.throttled
+        chapters = []
+        scheduler = BatchScheduler(fetcher, books, "KJV", workers=workers, keep_books=False,
+                                   on_chapter=lambda book, chapter, items: chapters.append(chapter))
+        _, elapsed, _ = _measure(scheduler.run)
+        fetcher.close()
+        results[label] = {"requests": server.hits - hits, "throttled": server.throttled - throttled, "chapters": len(chapters),
+                          "wall_s": round(elapsed, 3), "final_rate": round(limiter.rate, 2)}
+    return results
+
+
+def bench_search_redirect(server):
+    fetcher = BibleGatewayFetcher(delay_between_requests=0)
+    fetcher.BASE_URL = server.base_url
+    hits = server.hits
+    items, elapsed, _ = _measure(lambda: fetcher.fetch_entire_chapter("Jn", 3, "KJV"))
+    fetcher.close()
+    return {"search": "Jn 3", "requests": server.hits - hits, "items": len(items), "wall_s": round(elapsed, 3)}
+
+
+def bench_parallel(server, translations=("KJV", "ASV", "WEB")):
+    """One multi-version request against one request per translation, for John 3."""
+    results = {}
+    for label, fetch in (("separate", lambda f: [f.fetch_entire_chapter("John", 3, tr) for tr in translations]),
+                         ("parallel", lambda f: f.fetch_parallel_chapter("John", 3, translations))):
+        fetcher = BibleGatewayFetcher(delay_between_requests=0)
+        fetcher.BASE_URL = server.base_url
+        hits = server.hits
+        _, elapsed, _ = _measure(lambda: fetch(fetcher))
+        fetcher.close()
+        results[label] = {"requests": server.hits - hits, "wall_s": round(elapsed, 3)}
+    return {"translations": list(translations), **results}
+
+
+READING_PLAN = ("Gen 1:1-5; Gen 1:26-28; Gen 2:7; Gen 3:15; Ex 20:1-17; Deut 6:4-9; Ps 1; Ps 23; Ps 119:9-16; "
+                "Ps 119:105; Prov 3:5-6; Isa 40:28-31; Isa 53:4-6; Jer 29:11; Mt 5:3-12; Mt 6:9-13; Mt 28:18-20; "
+                "Jn 1:1-5, 14; Jn 3:16-17; Jn 14:6; Rom 3:23; Rom 5:8; Rom 6:23; Rom 8:1, 28-30, 38-39; Rom 12:1-2; "
+                "1 Cor 13:4-7; Gal 5:22-23; Eph 2:8-10; Phil 4:6-7, 13; Heb 11:1; Jas 1:5; 1 Jn 1:9; Rev 21:1-4")
+
+
+def bench_references(server, text=READING_PLAN):
+    """Reference list merged into chapter/span fetches against one request per reference."""
+    from bible_refs import parse_references
+    refs = parse_references(text)
+    results = {"references": len(refs)}
+    runs = (("per_reference", lambda f: [f.fetch_entire_chapter(r.book, r.chapter, "KJV") if r.verse_start is None else
+                                        f.fetch_verse_range(r.book, r.chapter, r.verse_start, r.verse_end, "KJV") for r in refs]),
+            ("merged", lambda f: f.fetch_references(refs, "KJV")))
+    for label, fetch in runs:
+        fetcher = BibleGatewayFetcher(delay_between_requests=0)
+        fetcher.BASE_URL = server.base_url
+        hits = server.hits
+        _, elapsed, _ = _measure(lambda: fetch(fetcher))
+        fetcher.close()
+        results[label] = {"requests": server.hits - hits, "wall_s": round(elapsed, 3)}
+    return results
+
+
+def bench_refresh(server, books, workers):
+    """Re-scrape of a saved batch: plain re-download against conditional requests with change detection."""
+    results = {"books": books}
+    with tempfile.TemporaryDirectory() as folder:
+        cache = ResponseCache(os.path.join(folder, "cache.sqlite3"))
+
+        def batch(label, refresh):
+            fetcher = BibleGatewayFetcher(delay_between_requests=0, cache=cache, refresh=refresh)
+            fetcher.BASE_URL = server.base_url
+            exporter = BatchExporter(folder, "KJV", skip_unchanged=True)
+            hits, not_modified, sent = server.hits, server.not_modified, server.bytes_sent
+            started = time.perf_counter()
+            BatchScheduler(fetcher, books, "KJV", workers=workers, on_chapter=exporter.write_chapter,
+                           on_book=lambda book, items: exporter.finish_book(book), keep_books=False).run()
+            elapsed = time.perf_counter() - started
+            fetcher.close()
+            report = exporter.report()
+            results[label] = {"requests": server.hits - hits, "not_modified": server.not_modified - not_modified,
+                              "bytes": server.bytes_sent - sent, "wall_s": round(elapsed, 3),
+                              "files_changed": report["changed"], "files_unchanged": report["unchanged"]}
+
+        batch("first", False)
+        batch("refresh", True)
+        server.edited.add(books[0])
+        batch("refresh_one_edited", True)
+        server.edited.clear()
+    cache.close()
+    return results
+
+
+def bench_navigation(server, book="John", chapters=(1, 2), think=0.2):
+    """Clicking verse by verse through chapters (think seconds between clicks): per-verse pages against
+    slices of cached chapters with the next chapter prefetched."""
+    results = {"book": book, "chapters": list(chapters)}
+    for label, chapter_cache in (("per_verse", None), ("chapter_cache", ChapterCache())):
+        fetcher = BibleGatewayFetcher(delay_between_requests=0, chapter_cache=chapter_cache)
+        fetcher.BASE_URL = server.base_url
+        hits = server.hits
+        latencies = []
+        for chapter in chapters:
+            for verse in range(1, verse_count(book, chapter, "KJV") + 1):
+                started = time.perf_counter()
+                fetcher.fetch_verse(book, chapter, verse, "KJV")
+                latencies.append(time.perf_counter() - started)
+                fetcher.prefetch_chapter(book, chapter + 1, "KJV")
+                if verse == 1 or verse == verse_count(book, chapter, "KJV"):
+                    time.sleep(think)   # only around chapter turns; the clicks in between cost no time here
+        fetcher.close()
+        worst = max(latencies[1:])
+        latencies.sort()
+        results[label] = {"lookups": len(latencies), "requests": server.hits - hits,
+                          "median_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+                          "worst_after_first_ms": round(worst * 1000, 3)}
+    return results
+
+
+def _retained(fn):
+    """Run fn under tracemalloc; returns (result, bytes still allocated once fn's temporaries are gone)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = fn()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def _timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_compact(books):
+    """Memory and speed of CompactPassage against the plain list of item dicts for whole books."""
+    fetcher = BibleGatewayFetcher()
+    pages = [(book, passage_page(book, 1, chapter_count(book, "KJV"), translation="KJV", notes_every=3)) for book in books]
+
+    def extract():
+        items = []
+        for book, html in pages:
+            for chapter_items in fetcher._extract_chapters(html, book=book).values():
+                items.extend(chapter_items)
+        return items
+
+    items, dict_bytes = _retained(extract)
+    compact, compact_bytes = _retained(lambda: CompactPassage.from_items(extract()))
+    assert list(compact) == items
+    return {
+        "books": books, "items": len(items),
+        "dict_bytes": dict_bytes, "compact_bytes": compact_bytes,
+        "dict_bytes_per_item": round(dict_bytes / len(items), 1),
+        "compact_bytes_per_item": round(compact_bytes / len(items), 1),
+        "memory_ratio": round(compact_bytes / dict_bytes, 3),
+        "build_ms": round(_timed(lambda: CompactPassage(items)) * 1000, 2),
+        "iterate_dicts_ms": round(_timed(lambda: [item.get("text") for item in items]) * 1000, 2),
+        "iterate_compact_ms": round(_timed(lambda: [item.get("text") for item in compact]) * 1000, 2),
+        "json_dicts_ms": round(_timed(lambda: json.dumps(items, ensure_ascii=False)) * 1000, 2),
+        "json_compact_ms": round(_timed(lambda: json.dumps(list(compact), ensure_ascii=False)) * 1000, 2),
+        "count_verses_dicts_ms": round(_timed(lambda: sum(1 for x in items if x["type"] == "verse")) * 1000, 3),
+        "count_verses_compact_ms": round(_timed(lambda: compact.count("verse")) * 1000, 3),
+    }
+
+
+def bench_archive(books=CANONICAL_BOOKS, lookups=10000, readers=12):
+    """Verse lookup from a saved translation: load Book_TRANSLATION.json against a memory-mapped archive."""
+    fetcher = BibleGatewayFetcher()
+    with tempfile.TemporaryDirectory() as folder:
+        per_book = BatchExporter(folder, "KJV", fmt="json")
+        packed = BatchExporter(folder, "KJV", fmt="archive")
+        verses = []
+        for book in books:
+            html = passage_page(book, 1, chapter_count(book, "KJV"), translation="KJV", notes_every=3)
+            for chapter, items in fetcher._extract_chapters(html, book=book).items():
+                per_book.write_chapter(book, chapter, items)
+                packed.write_chapter(book, chapter, items)
+                verses.extend((book, chapter, x["number"]) for x in items if x["type"] == "verse")
+            per_book.finish_book(book)
+        path = packed.finish()
+        target = ("Psalms", 119, 105) if "Psalms" in books else verses[len(verses) // 2]
+        book_json = per_book._final_path(target[0])
+
+        def from_json():
+            with open(book_json, encoding="utf-8") as f:
+                items = json.load(f)
+            return [x for x in items if x["type"] == "verse" and x["chapter"] == target[1] and x["number"] == target[2]]
+
+        def from_archive():
+            with ArchiveReader(path) as archive:
+                return archive.verse(*target)
+
+        json_text, _, json_peak = _measure(from_json)
+        assert " ".join(x["text"] for x in json_text) == from_archive()
+        sample = random.Random(1).choices(verses, k=lookups)
+        archive = ArchiveReader(path)
+        lookup_s = _timed(lambda: [archive.verse(*ref) for ref in sample])
+        range_s = _timed(lambda: [archive.verses(book, chapter, number, number + 9) for book, chapter, number in sample[:1000]])
+        archive.close()
+        opened, open_bytes = _retained(lambda: [ArchiveReader(path) for _ in range(readers)])
+        open_s = _timed(lambda: [ArchiveReader(path).close() for _ in range(readers)])
+        for reader in opened:
+            reader.close()
+        return {
+            "books": len(books), "verses": len(verses),
+            "archive_kib": os.path.getsize(path) // 1024, "book_json_kib": os.path.getsize(book_json) // 1024,
+            "json_load_lookup_ms": round(_timed(from_json) * 1000, 2), "json_peak_kib": round(json_peak / 1024, 1),
+            "archive_open_lookup_us": round(_timed(from_archive) * 1e6, 1),
+            "archive_lookup_us": round(lookup_s / lookups * 1e6, 2),
+            "archive_range10_us": round(range_s / 1000 * 1e6, 2),
+            "readers": readers, "readers_open_ms": round(open_s * 1000, 2), "readers_retained_kib": round(open_bytes / 1024, 1),
+        }
+
+
+def compare(old, new):
+    """Print new/old ratios for every timing that appears in both runs."""
+    def rows(run):
+        out = {}
+        for r in run.get("parse", []):
+            out[f"parse {r['page']} {r['parser']}{' passage' if r['passage_only'] else ''} ms"] = r["ms_per_page"]
+        for r in run.get("extract", []):
+            out[f"extract {r['page']} {r['parser']} ms"] = r["ms_per_page"]
+            out[f"extract {r['page']} {r['parser']} KiB"] = r["json_kib"]
+        for r in run.get("books", []):
+            out[f"book {r['book']} x{r['chapters_per_request']} s"] = r["wall_s"]
+            out[f"book {r['book']} x{r['chapters_per_request']} requests"] = r["requests"]
+        for r in run.get("batch", []):
+            out[f"batch w{r['workers']} x{r['chapters_per_request']} s"] = r["wall_s"]
+        if run.get("compact"):
+            out["compact bytes per item"] = run["compact"]["compact_bytes_per_item"]
+        if run.get("archive"):
+            out["archive lookup us"] = run["archive"]["archive_lookup_us"]
+        return out
+    before, after = rows(old), rows(new)
+    print(f"\n{'metric':64} {'before':>10} {'after':>10} {'ratio':>7}")
+    for key in before:
+        if key in after and before[key]:
+            print(f"{key:64} {before[key]:>10} {after[key]:>10} {after[key] / before[key]:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in server latency per request (seconds)")
+    parser.add_argument("--books", default="Ruth,Jonah,Mark", help="comma-separated books for the whole-book runs")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--compact-books", default="Genesis,Psalms,Matthew", help="books for the in-memory representation run")
+    parser.add_argument("--rate", type=float, default=200.0, help="token-bucket rate for the multi-book run (req/s)")
+    parser.add_argument("--bandwidth", type=int, default=512 * 1024, help="stand-in bytes/second for the streaming run")
+    parser.add_argument("--server-limit", type=float, default=40.0, help="stand-in requests/second before 429s (pacing run)")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="minimum timing window per parse case")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+    # Retries against the throttling stand-in are expected; only errors are worth printing
+    logging.basicConfig(level=logging.ERROR)
+    books = [b.strip() for b in args.books.split(",") if b.strip()]
+
+    run = {
+        "label": args.label,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "bs4": bs4.__version__, "lxml": HAVE_LXML},
+        "settings": {"latency": args.latency, "books": books, "workers": args.workers, "rate": args.rate},
+    }
+    print("Parsing the synthetic page set (make_pages.py)...")
+    run["parse"] = bench_parse(args.min_seconds)
+    for r in run["parse"]:
+        print(f"  {r['page']:34} {r['parser']:11} {'passage' if r['passage_only'] else 'full':7} "
+              f"{r['ms_per_page']:8.2f} ms  {r['chapters_per_sec']:8.1f} ch/s  peak {r['peak_kib']:8.1f} KiB")
+
+    print("Item extraction on long synthetic chapters (parsed tree in, items out)...")
+    run["extract"] = bench_extract(args.min_seconds)
+    for r in run["extract"]:
+        print(f"  {r['page']:28} {r['parser']:11} {r['ms_per_page']:8.2f} ms  {r['items']:5} items  {r['json_kib']:7.1f} KiB")
+
+    print("In-memory representation (list of dicts vs CompactPassage)...")
+    run["compact"] = c = bench_compact([b.strip() for b in args.compact_books.split(",") if b.strip()])
+    print(f"  {c['items']} items: dicts {c['dict_bytes_per_item']} B/item, compact {c['compact_bytes_per_item']} B/item "
+          f"({c['memory_ratio']:.0%}); build {c['build_ms']} ms; iterate {c['iterate_dicts_ms']} -> {c['iterate_compact_ms']} ms; "
+          f"json {c['json_dicts_ms']} -> {c['json_compact_ms']} ms; count verses {c['count_verses_dicts_ms']} -> {c['count_verses_compact_ms']} ms")
+
+    print("Verse lookup from a saved translation (Book_TRANSLATION.json vs packed archive)...")
+    run["archive"] = a = bench_archive()
+    print(f"  {a['verses']} verses, archive {a['archive_kib']} KiB: json load+lookup {a['json_load_lookup_ms']} ms "
+          f"(peak {a['json_peak_kib']} KiB) -> archive open+lookup {a['archive_open_lookup_us']} us; "
+          f"{a['archive_lookup_us']} us/verse, {a['archive_range10_us']} us/10-verse range; "
+          f"{a['readers']} readers open in {a['readers_open_ms']} ms, {a['readers_retained_kib']} KiB held")
+
+    with StandInServer(latency=args.latency) as server:
+        print(f"Whole-book runs (latency {args.latency}s)...")
+        run["books"] = bench_books(server, books, 1) + bench_books(server, books, 5)
+        for r in run["books"]:
+            print(f"  {r['book']:12} x{r['chapters_per_request']}  {r['requests']:4} requests  "
+                  f"{r['wall_s']:7.2f} s  peak {r['peak_kib']:8.1f} KiB")
+        print("Multi-book runs...")
+        run["batch"] = [bench_batch(server, books, 1, args.rate, 1),
+                        bench_batch(server, books, args.workers, args.rate, 1),
+                        bench_batch(server, books, args.workers, args.rate, 5)]
+        for r in run["batch"]:
+            print(f"  workers={r['workers']} x{r['chapters_per_request']}  {r['requests']:4} requests  "
+                  f"{r['wall_s']:7.2f} s  peak {r['peak_kib']:8.1f} KiB")
+        run["search_redirect"] = bench_search_redirect(server)
+        print(f"Search redirect: {run['search_redirect']['requests']} requests, {run['search_redirect']['wall_s']} s")
+        run["references"] = r = bench_references(server)
+        print(f"Reference list ({r['references']} refs): one request each {r['per_reference']['requests']} requests "
+              f"{r['per_reference']['wall_s']} s, merged {r['merged']['requests']} requests {r['merged']['wall_s']} s")
+        run["navigation"] = n = bench_navigation(server)
+        print(f"Verse-by-verse navigation ({n['book']} {n['chapters'][0]}-{n['chapters'][-1]}):")
+        for label in ("per_verse", "chapter_cache"):
+            x = n[label]
+            print(f"  {label:14} {x['lookups']} lookups  {x['requests']:4} requests  median {x['median_ms']} ms  "
+                  f"worst after the first {x['worst_after_first_ms']} ms")
+        run["refresh"] = r = bench_refresh(server, books, args.workers)
+        print(f"Refresh of {', '.join(books)}:")
+        for label in ("first", "refresh", "refresh_one_edited"):
+            x = r[label]
+            print(f"  {label:18} {x['requests']:4} requests  {x['not_modified']:4} x 304  {x['bytes'] // 1024:6} KiB  "
+                  f"{x['wall_s']:6.2f} s  {x['files_changed']} file(s) written, {x['files_unchanged']} untouched")
+        run["parallel"] = p = bench_parallel(server)
+        print(f"Side by side ({', '.join(p['translations'])}): separate {p['separate']['requests']} requests "
+              f"{p['separate']['wall_s']} s, parallel {p['parallel']['requests']} request {p['parallel']['wall_s']} s")
+
+    with StandInServer(latency=args.latency, bandwidth=args.bandwidth) as server:
+        print(f"Streaming parse (latency {args.latency}s, {args.bandwidth // 1024} KiB/s)...")
+        run["streaming"] = bench_streaming(server)
+        for r in run["streaming"]:
+            w, st = r["whole"], r["streaming"]
+            print(f"  {r['page']:18} first verse {w['first_verse_ms']:7.1f} -> {st['first_verse_ms']:7.1f} ms  "
+                  f"all {w['wall_ms']:7.1f} -> {st['wall_ms']:7.1f} ms  peak {w['peak_kib']:7.1f} -> {st['peak_kib']:7.1f} KiB")
+
+    with StandInServer(latency=args.latency, max_rate=args.server_limit) as server:
+        print(f"Pacing against a server limited to {args.server_limit:g} req/s...")
+        run["pacing"] = p = bench_pacing(server)
+        for label in ("fixed", "adaptive"):
+            r = p[label]
+            print(f"  {label:8} {r['requests']:4} requests  {r['throttled']:3} throttled  {r['wall_s']:6.2f} s  "
+                  f"ends at {r['final_rate']} req/s")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = time.strftime("%Y%m%d-%H%M%S") + (f"-{args.label}" if args.label else "") + ".json"
+        path = os.path.join(RESULTS_DIR, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"Saved {path}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), run)
+    return run
+
+
+if __name__ == "__main__":
+    main()
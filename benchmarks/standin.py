@@ -0,0 +1,336 @@
+"""Local stand-in for biblegateway.com's print interface.
+
+Serves the recorded pages in benchmarks/pages (see pages/index.json) and synthesizes any
+other chapter or chapter span with the same markup, so whole-book runs work offline.
+"""
+import hashlib
+import http.server
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from urllib.parse import urlparse, parse_qs, quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bible_verse_fetcher import TRANSLATION_CODES  # noqa: E402
+from bible_versification import chapter_numbers, verse_count  # noqa: E402
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+# OSIS-style abbreviations BibleGateway uses in verse span classes (Gen-1-1, 1Kgs-2-3, ...)
+OSIS = {
+    "Genesis": "Gen", "Exodus": "Exod", "Leviticus": "Lev", "Numbers": "Num", "Deuteronomy": "Deut",
+    "Joshua": "Josh", "Judges": "Judg", "Ruth": "Ruth", "1 Samuel": "1Sam", "2 Samuel": "2Sam",
+    "1 Kings": "1Kgs", "2 Kings": "2Kgs", "1 Chronicles": "1Chr", "2 Chronicles": "2Chr", "Ezra": "Ezra",
+    "Nehemiah": "Neh", "Esther": "Esth", "Job": "Job", "Psalms": "Ps", "Proverbs": "Prov",
+    "Ecclesiastes": "Eccl", "Song of Solomon": "Song", "Isaiah": "Isa", "Jeremiah": "Jer",
+    "Lamentations": "Lam", "Ezekiel": "Ezek", "Daniel": "Dan", "Hosea": "Hos", "Joel": "Joel",
+    "Amos": "Amos", "Obadiah": "Obad", "Jonah": "Jonah", "Micah": "Mic", "Nahum": "Nah",
+    "Habakkuk": "Hab", "Zephaniah": "Zeph", "Haggai": "Hag", "Zechariah": "Zech", "Malachi": "Mal",
+    "Matthew": "Matt", "Mark": "Mark", "Luke": "Luke", "John": "John", "Acts": "Acts", "Romans": "Rom",
+    "1 Corinthians": "1Cor", "2 Corinthians": "2Cor", "Galatians": "Gal", "Ephesians": "Eph",
+    "Philippians": "Phil", "Colossians": "Col", "1 Thessalonians": "1Thess", "2 Thessalonians": "2Thess",
+    "1 Timothy": "1Tim", "2 Timothy": "2Tim", "Titus": "Titus", "Philemon": "Phlm", "Hebrews": "Heb",
+    "James": "Jas", "1 Peter": "1Pet", "2 Peter": "2Pet", "1 John": "1John", "2 John": "2John",
+    "3 John": "3John", "Jude": "Jude", "Revelation": "Rev",
+    "Tobit": "Tob", "Judith": "Jdt", "Additions to Esther": "AddEsth", "Wisdom": "Wis", "Sirach": "Sir",
+    "Baruch": "Bar", "Letter of Jeremiah": "EpJer", "Prayer of Azariah": "PrAzar", "Susanna": "Sus",
+    "Bel and the Dragon": "Bel", "1 Maccabees": "1Macc", "2 Maccabees": "2Macc", "1 Esdras": "1Esd",
+    "2 Esdras": "2Esd", "Prayer of Manasseh": "PrMan",
+}
+POETRY_BOOKS = {"Job", "Psalms", "Proverbs", "Song of Solomon", "Lamentations"}
+
+WORDS = ("and the of unto he them shall his that in LORD for they be is him not with all thou thy was "
+         "which my me said ye have it I from upon thee by their as are were out so people house against "
+         "king God son day land men hand children came up made went before earth heart word father "
+         "into down over go say when then there water way now this also let behold even waters").split()
+
+# Roughly the weight of the real site's header, menus, scripts and footer around a passage
+_CHROME_SCRIPT = "\n".join(f"window.bgConfig{i} = {{slot: 'ad-{i}', sizes: [[300, 250], [728, 90]], lazy: true}};" for i in range(150))
+_CHROME_NAV = "".join(f'<li class="nav-item"><a href="/resources/{i}/">Resource link {i}</a></li>' for i in range(120))
+
+
+def _rng(*key):
+    return random.Random(zlib.crc32("|".join(map(str, key)).encode("utf-8")))
+
+
+def _sentence(rng, low=12, high=38):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", ";", ":"])
+
+
+class _Notes:
+    def __init__(self, translation):
+        self.translation = translation
+        self.footnotes = []
+        self.crossrefs = []
+
+    def footnote(self, verse_id, ref, rng):
+        letter = chr(ord("a") + len(self.footnotes) % 26)
+        fid = f"fen-{self.translation}-{verse_id}{letter}"
+        self.footnotes.append(f'<li id="{fid}"><a href="#en-{self.translation}-{verse_id}" title="Go to {ref}">{ref}</a> '
+                              f'<span class="footnote-text">Or <i>{_sentence(rng, 3, 8)}</i></span></li>')
+        return f'<sup data-fn="#{fid}" class="footnote" data-link="[&lt;a href=&quot;#{fid}&quot;&gt;{letter}&lt;/a&gt;]">[<a href="#{fid}" title="See footnote {letter}">{letter}</a>]</sup>'
+
+    def crossref(self, verse_id, ref, rng):
+        letter = chr(ord("A") + len(self.crossrefs) % 26)
+        cid = f"cen-{self.translation}-{verse_id}{letter}"
+        self.crossrefs.append(f'<li id="{cid}"><a href="#en-{self.translation}-{verse_id}" title="Go to {ref}">{ref}</a> : '
+                              f'<a class="crossref-link" href="/passage/?search=Ps+{rng.randint(1, 150)}:{rng.randint(1, 20)}">Ps {rng.randint(1, 150)}:{rng.randint(1, 20)}</a></li>')
+        return f'<sup class="crossreference" data-cr="#{cid}" data-link="(&lt;a href=&quot;#{cid}&quot;&gt;{letter}&lt;/a&gt;)">(<a href="#{cid}" title="See cross-reference {letter}">{letter}</a>)</sup>'
+
+
+def _chapter_html(book, chapter, translation, notes, next_id, notes_every=0):
+    osis = OSIS.get(book, book.replace(" ", ""))
+    verses = verse_count(book, chapter, translation) or verse_count(book, chapter) or 20
+    rng = _rng(book, chapter, translation)
+    poetry = book in POETRY_BOOKS
+    out = []
+    section = 8 if book == "Psalms" and chapter == 119 else rng.choice((0, 9, 12, 15))
+    paragraph_open = False
+    for verse in range(1, verses + 1):
+        verse_id = next_id()
+        cls = f"text {osis}-{chapter}-{verse}"
+        ref = f"{book} {chapter}:{verse}"
+        if section and (verse - 1) % section == 0:
+            if paragraph_open:
+                out.append("</p>" if not poetry else "</p></div>")
+                paragraph_open = False
+            out.append(f'<h3><span id="en-{translation}-{verse_id}" class="{cls}">{_sentence(rng, 2, 5)[:-1]}</span></h3>')
+        label = f'<span class="chapternum">{chapter}&nbsp;</span>' if verse == 1 else f'<sup class="versenum">{verse}&nbsp;</sup>'
+        text = _sentence(rng)
+        if notes_every and verse % notes_every == 0:
+            words = text.split(" ")
+            cut = len(words) // 2
+            text = " ".join(words[:cut]) + notes.footnote(verse_id, ref, rng) + " " + " ".join(words[cut:])
+            text += notes.crossref(verse_id, ref, rng)
+        if poetry:
+            if not paragraph_open or verse % 2 == 1:
+                if paragraph_open:
+                    out.append("</p></div>")
+                out.append('<div class="poetry"><p class="line">')
+                paragraph_open = True
+            else:
+                out.append("<br />")
+            second = _sentence(rng, 5, 14)
+            out.append(f'<span id="en-{translation}-{verse_id}" class="{cls}">{label}{text}</span><br />'
+                       f'<span class="indent-1"><span class="indent-1-breaks">&nbsp;&nbsp;&nbsp;&nbsp;</span>'
+                       f'<span class="{cls}">{second}</span></span>')
+        else:
+            if not paragraph_open:
+                out.append(f'<p class="chapter-{chapter}">' if verse == 1 else "<p>")
+                paragraph_open = True
+            out.append(f'<span id="en-{translation}-{verse_id}" class="{cls}">{label}{text}</span> ')
+            if rng.random() < 0.18:
+                out.append("</p>")
+                paragraph_open = False
+    if paragraph_open:
+        out.append("</p>" if not poetry else "</p></div>")
+    return "".join(out)
+
+
+def _label(translation):
+    return TRANSLATION_CODES.get(translation, {}).get("label", translation)
+
+
+def _document(title, columns):
+    """Site chrome around one passage column per (translation, body) pair."""
+    translations = ";".join(translation for translation, _ in columns)
+    cols = "".join(f'<div class="passage-col version-{translation}" data-translation="{translation}">\n{body}\n</div>'
+                   for translation, body in columns)
+    info = "".join(f"<p>{_label(translation)} ({translation}) Public Domain</p>" for translation, _ in columns)
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8" /><title>{title} {translations} - Bible Gateway</title>
+<link rel="stylesheet" href="/assets/css/print.css" /><script>{_CHROME_SCRIPT}</script></head>
+<body class="print-interface"><div class="bg-header"><h2 class="site-title">Bible Gateway</h2><ul class="nav">{_CHROME_NAV}</ul></div>
+<div class="passage-table"><div class="passage-cols">{cols}</div></div>
+<div class="publisher-info-bottom">{info}</div>
+<div class="footer"><ul class="nav">{_CHROME_NAV}</ul><script>{_CHROME_SCRIPT}</script></div>
+</body></html>
+"""
+
+
+def passage_page(book, first_chapter, last_chapter=None, translation="KJV", notes_every=0):
+    """A print-interface passage page for book first..last (a single chapter when last is None).
+
+    translation may list several versions ("KJV;ASV;WEB"), giving one column each, as the site does.
+    """
+    last_chapter = last_chapter or first_chapter
+    ref = f"{book} {first_chapter}" + (f"-{last_chapter}" if last_chapter != first_chapter else "")
+    columns = [(tr, _passage_body(book, first_chapter, last_chapter, tr, notes_every)) for tr in translation.split(";")]
+    return _document(ref, columns)
+
+
+def _passage_body(book, first_chapter, last_chapter, translation, notes_every):
+    notes = _Notes(translation)
+    counter = iter(range(1, 1_000_000))
+    chapters = "".join(_chapter_html(book, c, translation, notes, lambda: next(counter), notes_every)
+                       for c in range(first_chapter, last_chapter + 1))
+    ref = f"{book} {first_chapter}" + (f"-{last_chapter}" if last_chapter != first_chapter else "")
+    extras = ""
+    if notes.footnotes:
+        extras += f'<div class="footnotes"><h4>Footnotes</h4><ol>{"".join(notes.footnotes)}</ol></div>'
+    if notes.crossrefs:
+        extras += f'<div class="crossrefs hidden"><h4>Cross references</h4><ol>{"".join(notes.crossrefs)}</ol></div>'
+    body = (f'<div class="passage-text"><div class="passage-content passage-class-0">'
+            f'<div class="version-{translation} result-text-style-normal text-html">'
+            f'<h1 class="passage-display"><div class="bcv"><div class="dropdown-display-text">{ref}</div></div>'
+            f'<div class="translation"><div class="dropdown-display-text">{_label(translation)} ({translation})</div></div></h1>'
+            f'{chapters}{extras}</div></div></div>')
+    return body
+
+
+def search_results_page(query, target, translation="KJV"):
+    """Keyword search result list whose first hit is target (the fetcher auto-follows it)."""
+    href = f"/passage/?search={quote(target)}&amp;version={translation}&amp;interface=print"
+    body = (f'<div class="search-result-list"><article class="bible-item"><div class="bible-item-title-wrap">'
+            f'<a class="bible-item-title" href="{href}">{target}</a></div>'
+            f'<div class="bible-item-text">{query} ...</div></article></div>')
+    return _document(f"Search results for {query}", [(translation, body)])
+
+
+def _load_index():
+    path = os.path.join(PAGES_DIR, "index.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_SEARCH_RE = re.compile(r"^(.+?) (\d+)(?:-(\d+))?(?::[\d-]+)?$")
+
+
+def render(search, translation):
+    """Page body for a search/version pair: a recorded page if there is one, else a synthesized one."""
+    recorded = _load_index().get(f"{search}|{translation}")
+    if recorded:
+        with open(os.path.join(PAGES_DIR, recorded), encoding="utf-8") as f:
+            return 200, f.read()
+    m = _SEARCH_RE.match(search)
+    if not m or not chapter_numbers(m.group(1)):
+        return 200, search_results_page(search, search, translation)
+    book, first = m.group(1), int(m.group(2))
+    last = int(m.group(3)) if m.group(3) else first
+    known = chapter_numbers(book, translation.split(";")[0])
+    if first not in known:
+        # What the site does for a chapter past the end: a page with no verses in it
+        return 200, _document(search, [(translation, '<div class="passage-text"><div class="passage-content"></div></div>')])
+    return 200, passage_page(book, first, min(last, known[-1]), translation)
+
+
+class StandInServer:
+    """Threaded HTTP server answering /passage/?search=...&version=... with optional per-request latency.
+
+    bandwidth (bytes/second) sends each body in pieces at that rate, as a slow link would.
+    max_rate (requests/second over the last second) answers anything faster with
+    429 and Retry-After, the way the real site pushes back. Pages carry an ETag and
+    Last-Modified and a matching If-None-Match gets a 304; books listed in edited come
+    back with their first verse changed (a new ETag), like a corrected translation.
+    """
+
+    def __init__(self, latency=0.0, port=0, bandwidth=None, max_rate=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.max_rate = max_rate
+        self.throttled = 0
+        self.not_modified = 0
+        self.edited = set()
+        self._recent = deque()
+        self.hits = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this, keep-alive
+            # requests stall ~40 ms on Nagle + delayed ACK and swamp every timing
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if server.max_rate and server._over_rate():
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                search = query.get("search", [""])[0]
+                status, html = render(search, query.get("version", ["NIV"])[0])
+                if any(search.startswith(book + " ") for book in server.edited):
+                    html = re.sub(r'(class="text [^"]*">)', r"\1Revised ", html, count=1)
+                body = html.encode("utf-8")
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.hits += 1
+                    if self.headers.get("If-None-Match") == etag:
+                        server.not_modified += 1
+                        body = None
+                    else:
+                        server.bytes_sent += len(body)
+                self.send_response(304 if body is None else status)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+                if body is None:
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    if not server.bandwidth:
+                        self.wfile.write(body)
+                        return
+                    for start in range(0, len(body), 4096):
+                        self.wfile.write(body[start:start+4096])
+                        self.wfile.flush()
+                        time.sleep(4096 / server.bandwidth)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading once it had the passage
+                    self.close_connection = True
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def _over_rate(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_rate:
+                self.throttled += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}/passage/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
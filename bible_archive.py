@@ -0,0 +1,226 @@
+import json
+import mmap
+import os
+import struct
+
+# --- Packed verse archive: one translation in one memory-mapped file ---
+#
+#   header    MAGIC, version, book/chapter/verse slot counts, metadata length
+#   metadata  JSON: translation, book names (in slot order)
+#   books     one (first chapter slot, chapter count) pair per book
+#   chapters  one (first verse slot, verse count) pair per chapter 1..n of every book
+#   verses    one (text offset, text length) pair per verse 1..n of every chapter
+#   text      UTF-8 verse texts
+#
+# All table entries are little-endian uint32 pairs, so (book, chapter, verse) -> text is
+# three fixed-width reads. A verse missing from the translation has length 0.
+
+MAGIC = b"SSWVPAK\0"
+VERSION = 1
+ARCHIVE_EXT = ".vpack"
+_HEADER = struct.Struct("<8sHHIIII")    # magic, version, reserved, books, chapters, verses, metadata bytes
+_PAIR = struct.Struct("<II")
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+class ArchiveWriter:
+    """Builds a packed archive from item lists; texts go to disk as they arrive.
+
+    Items can be written in any order and in any number of calls (each verse item needs
+    book, chapter and number, as the fetcher makes them); a verse split over several
+    items (poetry lines) is joined with spaces. Only verses are kept. The file appears
+    at path when close() is called.
+    """
+
+    def __init__(self, path, translation):
+        self.path = path
+        self.translation = translation
+        self.count = 0
+        self._part = path + ".part"
+        self._text = open(self._part + ".text", "wb")
+        self._size = 0
+        self._books = {}    # book -> {chapter: {verse: (offset, length)}}
+        self._last = None
+
+    def write_items(self, items):
+        for item in items:
+            if item.get("type") != "verse" or item.get("number") is None or item.get("chapter") is None:
+                continue
+            book, chapter, verse = item.get("book"), int(item["chapter"]), int(item["number"])
+            data = item.get("text", "").encode("utf-8")
+            verses = self._books.setdefault(book, {}).setdefault(chapter, {})
+            if verse in verses:
+                if self._last != (book, chapter, verse):
+                    continue    # a repeat, not a continuation
+                # Next line of the verse just written: extend it in place
+                offset, length = verses[verse]
+                data = b" " + data
+                verses[verse] = (offset, length + len(data))
+            else:
+                verses[verse] = (self._size, len(data))
+                self.count += 1
+            self._text.write(data)
+            self._size += len(data)
+            self._last = (book, chapter, verse)
+        return self
+
+    def close(self):
+        """Write the tables and text into the final file."""
+        if self._text is None:
+            return self.path
+        self._text.close()
+        self._text = None
+        book_table, chapter_table, verse_table = [], [], []
+        for book, chapters in self._books.items():
+            book_table.append((len(chapter_table), max(chapters)))
+            for chapter in range(1, max(chapters) + 1):
+                verses = chapters.get(chapter, {})
+                last = max(verses, default=0)
+                chapter_table.append((len(verse_table), last))
+                verse_table.extend(verses.get(verse, (0, 0)) for verse in range(1, last + 1))
+        if self._size >= 2 ** 32:
+            raise ValueError("Archive text is larger than 4 GiB")
+        metadata = json.dumps({"translation": self.translation, "books": list(self._books)}, ensure_ascii=False).encode("utf-8")
+        with open(self._part, "wb") as out:
+            out.write(_HEADER.pack(MAGIC, VERSION, 0, len(book_table), len(chapter_table), len(verse_table), len(metadata)))
+            out.write(metadata)
+            out.write(b"\0" * (_align(out.tell()) - out.tell()))
+            for table in (book_table, chapter_table, verse_table):
+                out.write(b"".join(_PAIR.pack(*pair) for pair in table))
+            with open(self._part + ".text", "rb") as text:
+                while True:
+                    block = text.read(1 << 20)
+                    if not block:
+                        break
+                    out.write(block)
+        os.remove(self._part + ".text")
+        os.replace(self._part, self.path)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def abort(self):
+        """Drop everything written so far; the final file is never created."""
+        if self._text is not None:
+            self._text.close()
+            self._text = None
+            os.remove(self._part + ".text")
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def pack_files(paths, path, translation=None):
+    """Pack saved exports (Book_TRANSLATION.json / .jsonl / .jsonl.gz) of one translation into an archive."""
+    from bible_export import iter_jsonl
+    with ArchiveWriter(path, translation) as writer:
+        for source in paths:
+            if source.endswith(".json"):
+                with open(source, encoding="utf-8") as f:
+                    writer.write_items(json.load(f))
+            else:
+                writer.write_items(iter_jsonl(source))
+    return path
+
+
+class ArchiveReader:
+    """Read-only view of a packed archive through mmap; only the pages a lookup touches are read.
+
+    Opening reads the header and the small metadata block; verse(), verses() and chapter()
+    are a few fixed-width table reads plus the UTF-8 decode of the texts asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, n_books, n_chapters, n_verses, meta_len = _HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} verse archive")
+            metadata = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_len].decode("utf-8"))
+        except Exception:
+            self._mmap.close()
+            raise
+        self.translation = metadata["translation"]
+        self.books = metadata["books"]
+        self.verse_total = n_verses
+        self._book_index = {book: i for i, book in enumerate(self.books)}
+        self._books_at = _align(_HEADER.size + meta_len)
+        self._chapters_at = self._books_at + n_books * _PAIR.size
+        self._verses_at = self._chapters_at + n_chapters * _PAIR.size
+        self._text_at = self._verses_at + n_verses * _PAIR.size
+
+    def _chapter_slot(self, book, chapter):
+        """(first verse slot, verse count) of a chapter, or None if the archive does not have it."""
+        index = self._book_index.get(book)
+        if index is None:
+            return None
+        first_chapter, chapters = _PAIR.unpack_from(self._mmap, self._books_at + index * _PAIR.size)
+        if not 1 <= chapter <= chapters:
+            return None
+        return _PAIR.unpack_from(self._mmap, self._chapters_at + (first_chapter + chapter - 1) * _PAIR.size)
+
+    def _text(self, slot):
+        offset, length = _PAIR.unpack_from(self._mmap, self._verses_at + slot * _PAIR.size)
+        if not length:
+            return None
+        start = self._text_at + offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+    def chapter_count(self, book):
+        index = self._book_index.get(book)
+        return 0 if index is None else _PAIR.unpack_from(self._mmap, self._books_at + index * _PAIR.size)[1]
+
+    def verse_count(self, book, chapter):
+        slot = self._chapter_slot(book, chapter)
+        return slot[1] if slot else 0
+
+    def has_chapter(self, book, chapter):
+        slot = self._chapter_slot(book, chapter)
+        return bool(slot and slot[1])
+
+    def verse(self, book, chapter, verse):
+        """Text of one verse, or None."""
+        slot = self._chapter_slot(book, int(chapter))
+        if slot is None or not 1 <= int(verse) <= slot[1]:
+            return None
+        return self._text(slot[0] + int(verse) - 1)
+
+    def verses(self, book, chapter, verse_start=1, verse_end=None):
+        """Verse items verse_start..verse_end (default: to the end of the chapter), shaped like the fetcher's;
+        None if the archive does not have the chapter."""
+        chapter = int(chapter)
+        slot = self._chapter_slot(book, chapter)
+        if slot is None or not slot[1]:
+            return None
+        first, count = slot
+        last = count if verse_end is None else min(int(verse_end), count)
+        items = []
+        for number in range(max(1, int(verse_start)), last + 1):
+            text = self._text(first + number - 1)
+            if text is not None:
+                items.append({"type": "verse", "book": book, "chapter": chapter, "number": number, "text": text})
+        return items
+
+    def chapter(self, book, chapter):
+        return self.verses(book, chapter)
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"<ArchiveReader {self.translation} {len(self.books)} books, {self.verse_total} verse slots>"
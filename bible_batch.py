@@ -0,0 +1,456 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bible_cancel import Canceled, CancelToken
+from bible_versification import chapter_numbers
+
+
+class WorkUnit:
+    """One request's worth of a batch: a span of chapters of one book (chapters=None means the whole book, probed)."""
+    __slots__ = ("book", "chapters")
+
+    def __init__(self, book, chapters=None):
+        self.book = book
+        self.chapters = chapters
+
+    def __repr__(self):
+        if not self.chapters:
+            return f"WorkUnit({self.book!r})"
+        if len(self.chapters) == 1:
+            return f"WorkUnit({self.book!r}, {self.chapters[0]})"
+        return f"WorkUnit({self.book!r}, {self.chapters[0]}-{self.chapters[-1]})"
+
+
+def build_work_units(books, translation, chapters_per_request=1):
+    units = []
+    for book in books:
+        chapters = chapter_numbers(book, translation)
+        if not chapters:
+            units.append(WorkUnit(book))
+            continue
+        for start in range(0, len(chapters), chapters_per_request):
+            units.append(WorkUnit(book, chapters[start:start+chapters_per_request]))
+    return units
+
+
+class BatchJournal:
+    """Append-only JSON Lines checkpoint of finished chapters for one batch.
+
+    Each line is {"book", "chapter", "items"}; a torn last line from a crash is ignored.
+    Reopening the journal for the same book list and translation resumes the batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._reader = None
+
+    @classmethod
+    def for_batch(cls, folder, books, translation):
+        key = hashlib.sha1("\n".join([translation] + list(books)).encode("utf-8")).hexdigest()[:12]
+        return cls(os.path.join(folder, f".batch_{translation}_{key}.journal.jsonl"))
+
+    def index(self):
+        """{(book, chapter): offset} for every chapter already recorded; items stay on disk until read()."""
+        offsets = {}
+        if not os.path.exists(self.path):
+            return offsets
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+                if entry is not None:
+                    offsets[(entry["book"], entry["chapter"])] = offset
+                offset += len(line)
+        return offsets
+
+    def read(self, offset):
+        """The items of the chapter recorded at offset (from index())."""
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["items"]
+
+    def record(self, book, chapter, items):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"book": book, "chapter": chapter, "items": items}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BatchScheduler:
+    """Runs a multi-book download as book x chapter work units on a bounded thread pool.
+
+    Pacing is left to the fetcher's shared rate limiter, so several requests can be in
+    flight while the overall request rate stays fixed. Callbacks run on the thread that
+    calls run(), never on a worker:
+
+        on_progress(done_units, total_units, unit)
+        on_chapter(book, chapter, items) -- every chapter, in canonical order (books in input order)
+        on_book(book, items)             -- after a book's last chapter; items is None with keep_books=False
+        on_error(unit, exception)
+
+    Only chapters that arrive ahead of their turn are buffered, so with keep_books=False
+    memory stays flat no matter how many books are in the batch.
+
+    With a BatchJournal every finished chapter is checkpointed as soon as it arrives,
+    and chapters already in the journal are not requested again.
+
+    A chapter whose unit failed, or that came back without verses, is released empty and
+    listed in missing; on_book still runs for its book, which the caller should then not
+    treat as complete. run() returns False while anything is missing, so the journal is
+    kept for a rerun to fetch just those chapters.
+
+    pause_event and cancel_event drive a CancelToken handed to every fetch, so a pause or
+    cancel reaches requests in flight, rate-limit waits and retry backoff within a fraction
+    of a second. Chapters a canceled unit had already finished still go into the journal.
+
+    refresh, when not None, overrides the fetcher's refresh setting for this run's fetches
+    only, so a shared fetcher keeps serving other callers as configured.
+    """
+
+    def __init__(self, fetcher, books, translation, workers=4, chapters_per_request=1,
+                 pause_event=None, cancel_event=None, on_progress=None, on_book=None, on_error=None, journal=None,
+                 on_chapter=None, keep_books=True, refresh=None):
+        self.fetcher = fetcher
+        self.books = list(books)
+        self.translation = translation
+        self.workers = max(1, workers)
+        self.chapters_per_request = max(1, chapters_per_request)
+        self.pause_event = pause_event or threading.Event()
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_progress = on_progress
+        self.on_book = on_book
+        self.on_chapter = on_chapter
+        self.keep_books = keep_books
+        self.on_error = on_error
+        self.journal = journal
+        self.refresh = refresh
+        self.resumed_chapters = 0
+        # {book: [chapter, ...]} that failed or came back without verses (chapter None = the probed book)
+        self.missing = {}
+        self.token = CancelToken(self.cancel_event, self.pause_event)
+
+    def _run_unit(self, unit):
+        self.token.check()
+        if unit.chapters is None:
+            return {None: self.fetcher.fetch_entire_book(unit.book, self.translation, token=self.token, refresh=self.refresh)}
+        return self.fetcher.fetch_chapter_batch(unit.book, unit.chapters, self.translation,
+                                                token=self.token, refresh=self.refresh)
+
+    def run(self):
+        """Fetch everything; returns False if the batch was canceled or chapters are missing."""
+        journaled = self.journal.index() if self.journal is not None else {}
+        # Canonical (book, chapter) order every result is released in; chapter None = probed whole book
+        self._order = []
+        self._ready = {}
+        # Journaled chapters are read back only when their turn comes, so a resume holds offsets, not items
+        self._resumed = {}
+        units = []
+        for unit in build_work_units(self.books, self.translation, self.chapters_per_request):
+            missing = []
+            for chapter in unit.chapters or [None]:
+                key = (unit.book, chapter)
+                self._order.append(key)
+                if key in journaled:
+                    self._resumed[key] = journaled[key]
+                    self.resumed_chapters += 1
+                else:
+                    missing.append(chapter)
+            if missing:
+                units.append(WorkUnit(unit.book, None if missing == [None] else missing))
+        journaled = None
+        self._position = 0
+        self._book_items = []
+        self._flush()
+        done = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self._run_unit, unit): unit for unit in units}
+                canceling = False
+                for future in as_completed(futures):
+                    unit = futures[future]
+                    if future.cancelled():
+                        continue
+                    try:
+                        chapters = future.result() or {}
+                    except Canceled as e:
+                        # Keep what the unit finished so a rerun resumes after it
+                        if self.journal is not None and isinstance(e.partial, dict):
+                            for chapter, items in e.partial.items():
+                                if any(x["type"] == "verse" for x in items):
+                                    self.journal.record(unit.book, chapter, items)
+                        continue
+                    except Exception as e:
+                        chapters = {}
+                        if self.on_error:
+                            self.on_error(unit, e)
+                    for chapter in unit.chapters or [None]:
+                        items = chapters.get(chapter) or []
+                        if not any(x["type"] == "verse" for x in items):
+                            items = []
+                            self.missing.setdefault(unit.book, []).append(chapter)
+                        elif self.journal is not None:
+                            self.journal.record(unit.book, chapter, items)
+                        self._ready[(unit.book, chapter)] = items
+                    done += 1
+                    if self.on_progress:
+                        self.on_progress(done, len(units), unit)
+                    if self.cancel_event.is_set():
+                        # Units still running end with Canceled; drain them so their partial chapters are journaled
+                        if not canceling:
+                            canceling = True
+                            for pending in futures:
+                                pending.cancel()
+                        continue
+                    self._flush()
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+        return not self.cancel_event.is_set() and not self.missing
+
+    def _flush(self):
+        # Release every result whose turn has come, in canonical order
+        while self._position < len(self._order):
+            key = self._order[self._position]
+            if key in self._ready:
+                items = self._ready.pop(key)
+            elif key in self._resumed:
+                items = self.journal.read(self._resumed.pop(key))
+            else:
+                break
+            book, chapter = key
+            self._position += 1
+            if items and self.on_chapter:
+                self.on_chapter(book, chapter, items)
+            if self.keep_books:
+                self._book_items.extend(items)
+            last_of_book = self._position == len(self._order) or self._order[self._position][0] != book
+            if last_of_book:
+                if self.on_book:
+                    self.on_book(book, self._book_items if self.keep_books else None)
+                self._book_items = []
+
+
+def _unit_id(translation, book, chapters):
+    span = "all" if not chapters else f"{chapters[0]:03d}-{chapters[-1]:03d}"
+    return f"{translation}_{book.replace(' ', '_')}_{span}"
+
+
+class WorkManifest:
+    """A shared-directory work list of translation x book x chapter-span units, for several workers at once.
+
+    Layout under folder:
+
+        manifest.json         every unit, in canonical order
+        claims/<unit>.claim   held by the worker fetching that unit (created with O_EXCL)
+        units/<unit>.json     a finished unit's chapters, written atomically before its claim is released
+
+    Any number of processes, on one machine or several sharing the folder, can run
+    work units from it: a unit is fetched by whoever creates its claim file first,
+    and is never fetched again once its result exists. A worker touches its claim while
+    the unit is being fetched; a claim untouched for stale_after seconds is taken to
+    belong to a dead worker and may be taken over.
+    """
+
+    VERSION = 1
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, "manifest.json")
+        self.claims_dir = os.path.join(folder, "claims")
+        self.units_dir = os.path.join(folder, "units")
+        self.units = []
+        self.info = {}
+
+    @classmethod
+    def create(cls, folder, translations, books, chapters_per_request=1, force=False):
+        """Write the manifest for every translation x book; an existing one is kept if it describes the same run."""
+        manifest = cls(folder)
+        units = []
+        for translation in translations:
+            for unit in build_work_units(books, translation, chapters_per_request):
+                units.append({"id": _unit_id(translation, unit.book, unit.chapters), "translation": translation,
+                              "book": unit.book, "chapters": unit.chapters})
+        info = {"version": cls.VERSION, "translations": list(translations), "books": list(books),
+                "chapters_per_request": chapters_per_request}
+        if os.path.exists(manifest.path) and not force:
+            manifest.load()
+            if manifest.info != info:
+                raise ValueError(f"{manifest.path} already describes a different run (use force to replace it)")
+            return manifest
+        os.makedirs(manifest.claims_dir, exist_ok=True)
+        os.makedirs(manifest.units_dir, exist_ok=True)
+        manifest.info = info
+        manifest.units = units
+        _write_atomic(manifest.path, dict(info, created=time.strftime("%Y-%m-%dT%H:%M:%S"), units=units))
+        return manifest
+
+    @classmethod
+    def open(cls, folder):
+        manifest = cls(folder)
+        manifest.load()
+        return manifest
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != self.VERSION:
+            raise ValueError(f"Unsupported manifest version in {self.path}")
+        self.units = data.pop("units")
+        data.pop("created", None)
+        self.info = data
+        os.makedirs(self.claims_dir, exist_ok=True)
+        os.makedirs(self.units_dir, exist_ok=True)
+
+    def reset(self):
+        """Forget every finished unit (for a refresh run); returns how many results were removed."""
+        removed = 0
+        for unit in self.units:
+            try:
+                os.remove(self.result_path(unit))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def shard(self, index, count):
+        """Units of shard index (0-based) out of count, dealt round-robin so shards stay even."""
+        return self.units[index::count]
+
+    # --- State of one unit ---
+    def _claim_path(self, unit):
+        return os.path.join(self.claims_dir, unit["id"] + ".claim")
+
+    def result_path(self, unit):
+        return os.path.join(self.units_dir, unit["id"] + ".json")
+
+    def is_done(self, unit):
+        return os.path.exists(self.result_path(unit))
+
+    def claim_age(self, unit):
+        """Seconds since the unit was claimed (or last touched), or None if unclaimed."""
+        try:
+            return time.time() - os.path.getmtime(self._claim_path(unit))
+        except FileNotFoundError:
+            return None
+
+    # --- Claim protocol ---
+    def claim(self, unit, worker, stale_after=900):
+        """Try to take the unit for worker; True if it is now ours and still needs fetching."""
+        if self.is_done(unit):
+            return False
+        path = self._claim_path(unit)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                seen = os.stat(path)
+            except FileNotFoundError:
+                return self.claim(unit, worker, stale_after)    # released in the meantime
+            if time.time() - seen.st_mtime < stale_after:
+                return False
+            if not self._take_over(path, worker, seen):
+                return False
+            return self.claim(unit, worker, stale_after)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"worker": worker, "pid": os.getpid(), "claimed_at": time.time()}, f)
+        # The previous holder may have finished between our done-check and the claim
+        if self.is_done(unit):
+            self.release(unit)
+            return False
+        return True
+
+    @staticmethod
+    def _take_over(path, worker, seen):
+        """Remove the stale claim seen (an os.stat result); False if the file is no longer that claim.
+
+        Several workers can judge the same claim stale. Whoever renames it aside first
+        removes it and claims the unit afresh; a later rename may catch that fresh claim
+        (or one its holder has just touched) instead, which is told apart by inode and
+        mtime and linked back into place.
+        """
+        aside = f"{path}.{worker}.{os.getpid()}.stale"
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            return False
+        moved = os.stat(aside)
+        if (moved.st_ino, moved.st_mtime_ns) != (seen.st_ino, seen.st_mtime_ns):
+            try:
+                os.link(aside, path)    # unlike rename, never replaces a claim made since
+            except FileExistsError:
+                pass
+            os.remove(aside)
+            return False
+        os.remove(aside)
+        return True
+
+    def touch(self, unit):
+        """Refresh a held claim's mtime so a long fetch is not taken for a dead worker; False if the claim is gone."""
+        try:
+            os.utime(self._claim_path(unit))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, unit):
+        try:
+            os.remove(self._claim_path(unit))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, unit, chapters, worker):
+        """Record the unit's {chapter: items} and release its claim."""
+        _write_atomic(self.result_path(unit), {"id": unit["id"], "worker": worker, "finished_at": time.time(),
+                                               "chapters": [[chapter, items] for chapter, items in chapters.items()]})
+        self.release(unit)
+
+    def load_result(self, unit):
+        """{chapter: items} of a finished unit, in chapter order."""
+        with open(self.result_path(unit), encoding="utf-8") as f:
+            return {chapter: items for chapter, items in json.load(f)["chapters"]}
+
+    def status(self, stale_after=900):
+        """Unit counts: done, claimed (live claim), stale (claim older than stale_after) and pending."""
+        counts = {"total": len(self.units), "done": 0, "claimed": 0, "stale": 0, "pending": 0}
+        for unit in self.units:
+            if self.is_done(unit):
+                counts["done"] += 1
+                continue
+            age = self.claim_age(unit)
+            if age is None:
+                counts["pending"] += 1
+            else:
+                counts["stale" if age >= stale_after else "claimed"] += 1
+        return counts
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,200 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+
+from bible_compact import CompactPassage
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".scripture_scrapeway", "page_cache.sqlite3")
+
+
+def translation_from_url(url):
+    """Pull the version= parameter back out of a _build_url() URL."""
+    values = parse_qs(urlparse(url).query).get("version")
+    return values[0] if values else None
+
+
+class ResponseCache:
+    """Persistent, zlib-compressed page cache keyed by passage URL.
+
+    Entries are evicted least-recently-used once the compressed total passes
+    max_bytes. ttl maps translation code -> seconds (None = never expires);
+    default_ttl applies to translations not listed; an expired page is a miss for
+    get() but is kept. Each page keeps the ETag and Last-Modified it was served
+    with, so a refresh or an expired page can be revalidated with a conditional
+    request instead of being downloaded again.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=256 * 1024 * 1024, ttl=None, default_ttl=None):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                translation TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )""")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pages)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                # Cache files from before validators were kept
+                self._db.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages(last_used)")
+        self._db.commit()
+
+    def _ttl_for(self, translation):
+        return self.ttl.get(translation, self.default_ttl)
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT body, translation, stored_at FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, translation, stored_at = row
+            ttl = self._ttl_for(translation)
+            now = time.time()
+            if ttl is not None and now - stored_at > ttl:
+                # Expired pages stay (until evicted for space) so entry() can revalidate them
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE pages SET last_used = ? WHERE url = ?", (now, url))
+            self._db.commit()
+            self.hits += 1
+        return zlib.decompress(body).decode("utf-8")
+
+    def entry(self, url):
+        """(html, etag, last_modified) for url whatever its age, or None; for revalidation."""
+        with self._lock:
+            row = self._db.execute("SELECT body, etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), row[1], row[2]
+
+    def touch(self, url):
+        """The server confirmed the page is unchanged (304): it counts as freshly stored."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE pages SET stored_at = ?, last_used = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+
+    def put(self, url, html, etag=None, last_modified=None):
+        body = zlib.compress(html.encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, translation, body, size, stored_at, last_used, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, translation_from_url(url), body, len(body), now, now, etag, last_modified))
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+
+    def __contains__(self, url):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone() is not None
+
+    def size_bytes(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def clear(self, translation=None):
+        with self._lock:
+            if translation:
+                self._db.execute("DELETE FROM pages WHERE translation = ?", (translation,))
+            else:
+                self._db.execute("DELETE FROM pages")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ChapterCache:
+    """In-process LRU of parsed chapters keyed by (translation, book, chapter).
+
+    Chapters are kept as CompactPassage columns and handed back as fresh item dicts, so
+    callers may change what they get. The least recently used chapters are dropped once
+    the cache holds more than max_items items or max_bytes bytes (CompactPassage.nbytes);
+    the newest chapter is always kept.
+    """
+
+    def __init__(self, max_items=None, max_bytes=16 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.items = 0
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._chapters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, translation, book, chapter):
+        """The chapter's items, or None."""
+        key = (translation, book, int(chapter))
+        with self._lock:
+            passage = self._chapters.get(key)
+            if passage is None:
+                self.misses += 1
+                return None
+            self._chapters.move_to_end(key)
+            self.hits += 1
+        return list(passage)
+
+    def put(self, translation, book, chapter, items):
+        passage = CompactPassage(items)
+        key = (translation, book, int(chapter))
+        with self._lock:
+            old = self._chapters.pop(key, None)
+            if old is not None:
+                self.items -= len(old)
+                self.nbytes -= old.nbytes
+            self._chapters[key] = passage
+            self.items += len(passage)
+            self.nbytes += passage.nbytes
+            while len(self._chapters) > 1 and ((self.max_items is not None and self.items > self.max_items)
+                                               or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+                _, evicted = self._chapters.popitem(last=False)
+                self.items -= len(evicted)
+                self.nbytes -= evicted.nbytes
+
+    def __contains__(self, key):
+        translation, book, chapter = key
+        with self._lock:
+            return (translation, book, int(chapter)) in self._chapters
+
+    def __len__(self):
+        return len(self._chapters)
+
+    def clear(self):
+        with self._lock:
+            self._chapters.clear()
+            self.items = self.nbytes = 0
@@ -0,0 +1,64 @@
+import threading
+
+
+class Canceled(BaseException):
+    """Raised inside a fetch whose CancelToken was canceled.
+
+    A BaseException (like asyncio.CancelledError) so the per-chapter `except Exception`
+    retries and fallbacks let it through. partial, when set, holds what the interrupted
+    call had finished: a {chapter: items} dict or an item list, the same shape it returns.
+    """
+
+    def __init__(self, message="Canceled", partial=None):
+        super().__init__(message)
+        self.partial = partial
+
+
+class CancelToken:
+    """Cooperative pause/cancel for fetches, shared by every thread of a run.
+
+    The fetcher checks it between chapters, sleeps on it (rate limiting, retry backoff)
+    and polls it every POLL seconds while a request is in flight, so pause and cancel take
+    effect within a fraction of a second: check() blocks while paused and raises Canceled
+    once canceled. The events may be shared with the code driving the run (e.g. GUI buttons).
+    """
+
+    POLL = 0.05
+
+    def __init__(self, cancel_event=None, pause_event=None):
+        self.cancel_event = cancel_event or threading.Event()
+        self.pause_event = pause_event or threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def pause(self):
+        self.pause_event.set()
+
+    def resume(self):
+        self.pause_event.clear()
+
+    @property
+    def canceled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def paused(self):
+        return self.pause_event.is_set()
+
+    @property
+    def interrupted(self):
+        """True while work in flight should stop: canceled or paused."""
+        return self.cancel_event.is_set() or self.pause_event.is_set()
+
+    def check(self):
+        """Wait out a pause; raise Canceled if canceled."""
+        while self.pause_event.is_set() and not self.cancel_event.is_set():
+            self.cancel_event.wait(self.POLL)
+        if self.cancel_event.is_set():
+            raise Canceled()
+
+    def sleep(self, seconds):
+        """time.sleep that ends early, raising Canceled, when the token is canceled."""
+        if self.cancel_event.wait(max(0.0, seconds)):
+            raise Canceled()
@@ -0,0 +1,313 @@
+"""Headless batch downloads: plan a work manifest, run workers on shards of it, assemble the files.
+
+    python bible_cli.py plan  ARCHIVE --translations KJV,ASV --books nt --chapters-per-request 5
+    python bible_cli.py work  ARCHIVE --shard 1/3 --rate 0.5 --max-rate 1   # on each machine / process
+    python bible_cli.py status ARCHIVE
+    python bible_cli.py assemble ARCHIVE --format jsonl.gz
+    python bible_cli.py pack Bible_KJV.vpack KJV/*_KJV.json            # saved exports -> packed verse archive
+
+A refresh of a finished run: plan --refresh, work --cache --refresh (pages the cache holds are
+revalidated, so unchanged ones cost a 304), assemble --skip-unchanged (only changed books are
+rewritten, with a changed/unchanged report).
+
+ARCHIVE is a directory every worker can reach (a shared or network file system works).
+Workers claim units through lock files in it, so any number of them can run at once,
+each with its own request rate; a killed worker's units are picked up again once its
+claims go stale. No tkinter is imported.
+"""
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+
+from bible_archive import ArchiveReader, pack_files
+from bible_batch import WorkManifest
+from bible_cache import ResponseCache
+from bible_export import EXPORT_FORMATS, BatchExporter
+from bible_metrics import JsonLogFormatter
+from bible_ratelimit import AdaptiveRateLimiter
+from bible_refs import resolve_book
+from bible_store import VerseStore
+from bible_verse_fetcher import BibleGatewayFetcher, CANONICAL_BOOKS, DEUTERO_BOOKS, TRANSLATION_CODES
+
+log = logging.getLogger("bible_cli")
+
+BOOK_GROUPS = {
+    "all": CANONICAL_BOOKS,
+    "ot": CANONICAL_BOOKS[:39],
+    "nt": CANONICAL_BOOKS[39:],
+    "deutero": DEUTERO_BOOKS,
+}
+
+
+def parse_books(text):
+    """Comma-separated book names/abbreviations or groups (all, ot, nt, deutero), in the order given."""
+    books = []
+    for name in text.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        group = BOOK_GROUPS.get(name.lower())
+        if group is None:
+            book = resolve_book(name)
+            if book is None:
+                raise ValueError(f"Unknown book {name!r}")
+            group = [book]
+        books.extend(book for book in group if book not in books)
+    return books
+
+
+def parse_translations(text):
+    translations = []
+    for code in text.replace(";", ",").split(","):
+        code = code.strip().upper()
+        if not code:
+            continue
+        if code not in TRANSLATION_CODES:
+            raise ValueError(f"Unknown translation {code!r}")
+        if code not in translations:
+            translations.append(code)
+    return translations
+
+
+def parse_shard(text):
+    """'2/4' -> (1, 4): shard index (0-based) and count."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard must look like K/N, not {text!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Shard {text!r} out of range")
+    return index - 1, count
+
+
+def cmd_plan(args):
+    manifest = WorkManifest.create(args.archive, parse_translations(args.translations), parse_books(args.books),
+                                   chapters_per_request=args.chapters_per_request, force=args.force)
+    if args.refresh:
+        log.info("Refresh: %d finished units will be fetched again", manifest.reset())
+    log.info("Manifest %s: %d units (%s; %d books)", manifest.path, len(manifest.units),
+             ", ".join(manifest.info["translations"]), len(manifest.info["books"]))
+    return 0
+
+
+def _fetch_unit(fetcher, unit):
+    """{chapter: items} for the unit, or None unless every chapter came back with verses."""
+    if unit["chapters"] is None:
+        items = fetcher.fetch_entire_book(unit["book"], unit["translation"])
+        chapters = {None: items}
+    else:
+        chapters = fetcher.fetch_chapter_batch(unit["book"], unit["chapters"], unit["translation"])
+    if all(any(x["type"] == "verse" for x in items) for items in chapters.values()):
+        return chapters
+    return None
+
+
+def _keep_claim(manifest, unit, interval, stop):
+    """Touch the unit's claim every interval seconds until stop is set, so a slow fetch never looks stale."""
+    while not stop.wait(interval):
+        if not manifest.touch(unit):
+            log.warning("Claim on %s was taken over", unit["id"])
+            return
+
+
+def cmd_work(args):
+    manifest = WorkManifest.open(args.archive)
+    worker = args.worker or f"{socket.gethostname()}-{os.getpid()}"
+    fetcher = BibleGatewayFetcher(
+        rate_limiter=AdaptiveRateLimiter(rate=args.rate, min_rate=args.min_rate, max_rate=max(args.rate, args.max_rate), burst=2),
+        cache=ResponseCache() if args.cache else None,
+        store=VerseStore(args.store) if args.store else None,
+        refresh=args.refresh)
+    if args.base_url:
+        fetcher.BASE_URL = args.base_url
+    units = manifest.shard(*args.shard) if args.shard else manifest.units
+    if args.shard and args.steal:
+        # Own shard first, then anything the other shards have not claimed yet
+        own = {unit["id"] for unit in units}
+        units = units + [unit for unit in manifest.units if unit["id"] not in own]
+    done = failed = 0
+    current = None
+    try:
+        for unit in units:
+            if not manifest.claim(unit, worker, args.stale_after):
+                continue
+            current = unit
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_keep_claim, args=(manifest, unit, args.stale_after / 3, stop),
+                                         name="claim-heartbeat", daemon=True)
+            heartbeat.start()
+            try:
+                chapters = _fetch_unit(fetcher, unit)
+            except Exception as e:
+                chapters = None
+                log.warning("Failed to fetch %s: %s", unit["id"], e)
+            finally:
+                stop.set()
+                heartbeat.join()
+            if chapters is None:
+                # Leave it for a later run (or another worker) rather than recording a partial unit
+                manifest.release(unit)
+                current = None
+                failed += 1
+                log.warning("Unit %s incomplete; released", unit["id"])
+                continue
+            manifest.complete(unit, chapters, worker)
+            current = None
+            done += 1
+            log.info("Finished %s (%d done, %d failed)", unit["id"], done, failed)
+            if args.limit and done >= args.limit:
+                break
+    except KeyboardInterrupt:
+        if current is not None:
+            manifest.release(current)
+        log.warning("Interrupted")
+        return 130
+    finally:
+        fetcher.close()
+        totals = fetcher.metrics.totals()
+        log.info("Worker %s: %d units done, %d failed, %d requests (%d not modified, %.2f req/s)",
+                 worker, done, failed, totals["requests"], totals["not_modified"], totals["requests_per_sec"] or 0)
+        if args.metrics:
+            fetcher.metrics.to_json(args.metrics)
+    return 0 if failed == 0 else 1
+
+
+def cmd_status(args):
+    manifest = WorkManifest.open(args.archive)
+    counts = manifest.status(args.stale_after)
+    print(" ".join(f"{key}={value}" for key, value in counts.items()))
+    return 0 if counts["done"] == counts["total"] else 1
+
+
+def cmd_assemble(args):
+    """Write Book_TRANSLATION files (or one Bible file per translation) from the finished units, in canonical order."""
+    manifest = WorkManifest.open(args.archive)
+    missing = [unit["id"] for unit in manifest.units if not manifest.is_done(unit)]
+    if missing and not args.partial:
+        log.error("%d of %d units are not finished (first: %s); run more workers or pass --partial",
+                  len(missing), len(manifest.units), missing[0])
+        return 1
+    output = args.output or args.archive
+    for translation in manifest.info["translations"]:
+        folder = os.path.join(output, translation)
+        os.makedirs(folder, exist_ok=True)
+        exporter = BatchExporter(folder, translation, fmt=args.format, combined=args.combined,
+                                 skip_unchanged=args.skip_unchanged)
+        units = [unit for unit in manifest.units if unit["translation"] == translation]
+        written = False
+        try:
+            for i, unit in enumerate(units):
+                if manifest.is_done(unit):
+                    for chapter, items in manifest.load_result(unit).items():
+                        exporter.write_chapter(unit["book"], chapter, items)
+                    written = True
+                last_of_book = i + 1 == len(units) or units[i + 1]["book"] != unit["book"]
+                if last_of_book and written:
+                    written = False
+                    path = exporter.finish_book(unit["book"])
+                    if path:
+                        log.info("%s %s", "Unchanged" if path in exporter.unchanged else "Saved", path)
+            path = exporter.finish()
+            if path:
+                log.info("%s %s", "Unchanged" if path in exporter.unchanged else "Saved", path)
+        finally:
+            exporter.abort()
+        if args.skip_unchanged:
+            report = exporter.report()
+            log.info("%s: %d file(s) changed (%d chapters), %d unchanged%s", translation, report["changed"],
+                     report["changed_chapters"], report["unchanged"],
+                     f": {', '.join(report['changed_files'])}" if report["changed_files"] else "")
+    return 0
+
+
+def cmd_pack(args):
+    """Pack saved Book_TRANSLATION exports of one translation into a memory-mapped verse archive."""
+    translation = args.translation
+    if translation is None:
+        # Book_TRANSLATION.ext, as the exporters name them
+        names = {os.path.basename(path).split(".")[0].rsplit("_", 1)[-1] for path in args.files}
+        if len(names) != 1:
+            raise ValueError("Cannot tell the translation from the file names; pass --translation")
+        translation = names.pop()
+    pack_files(args.files, args.output, translation)
+    with ArchiveReader(args.output) as archive:
+        log.info("Packed %s: %s, %d books, %d verse slots, %d KiB", args.output, archive.translation,
+                 len(archive.books), archive.verse_total, os.path.getsize(args.output) // 1024)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless Scripture Scrapeway batch downloads.")
+    parser.add_argument("--log-json", action="store_true", help="log one JSON object per line")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="write the work manifest")
+    plan.add_argument("archive")
+    plan.add_argument("--translations", default="NIV", help="comma-separated codes, e.g. KJV,ASV,WEB")
+    plan.add_argument("--books", default="all", help="comma-separated books or all/ot/nt/deutero")
+    plan.add_argument("--chapters-per-request", type=int, default=1)
+    plan.add_argument("--force", action="store_true", help="replace a manifest for a different run")
+    plan.add_argument("--refresh", action="store_true", help="fetch every unit again, even finished ones")
+    plan.set_defaults(func=cmd_plan)
+
+    work = commands.add_parser("work", help="fetch unclaimed units")
+    work.add_argument("archive")
+    work.add_argument("--shard", type=parse_shard, help="K/N: only units of shard K of N")
+    work.add_argument("--steal", action="store_true", help="after the shard, help with unclaimed units of other shards")
+    work.add_argument("--rate", type=float, default=1.0, help="this worker's starting requests per second")
+    work.add_argument("--max-rate", type=float, default=2.0, help="ceiling the worker may speed up to while the site keeps up")
+    work.add_argument("--min-rate", type=float, default=0.1, help="floor it backs off to when the site pushes back")
+    work.add_argument("--worker", help="worker name in claim files (default host-pid)")
+    work.add_argument("--stale-after", type=float, default=900, help="seconds after which a claim is taken over")
+    work.add_argument("--limit", type=int, default=0, help="stop after this many units")
+    work.add_argument("--cache", action="store_true", help="use the local page cache")
+    work.add_argument("--store", help="also keep chapters in this SQLite verse store")
+    work.add_argument("--refresh", action="store_true", help="revalidate cached pages (304s) instead of answering from cache/store")
+    work.add_argument("--metrics", help="write this worker's fetch metrics (JSON) here")
+    work.add_argument("--base-url", help=argparse.SUPPRESS)
+    work.set_defaults(func=cmd_work)
+
+    status = commands.add_parser("status", help="count done/claimed/stale/pending units")
+    status.add_argument("archive")
+    status.add_argument("--stale-after", type=float, default=900)
+    status.set_defaults(func=cmd_status)
+
+    assemble = commands.add_parser("assemble", help="write the export files from finished units")
+    assemble.add_argument("archive")
+    assemble.add_argument("--output", help="folder for the TRANSLATION/ subfolders (default: the archive)")
+    assemble.add_argument("--format", choices=list(EXPORT_FORMATS), default="json")
+    assemble.add_argument("--combined", action="store_true", help="one Bible_TRANSLATION file per translation")
+    assemble.add_argument("--partial", action="store_true", help="assemble even if units are missing")
+    assemble.add_argument("--skip-unchanged", action="store_true", help="leave files whose chapters hash the same as last time")
+    assemble.set_defaults(func=cmd_assemble)
+
+    pack = commands.add_parser("pack", help="pack saved exports into a memory-mapped verse archive")
+    pack.add_argument("output", help="archive file to write (.vpack)")
+    pack.add_argument("files", nargs="+", help="Book_TRANSLATION .json/.jsonl/.jsonl.gz exports, in book order")
+    pack.add_argument("--translation", help="translation code (default: from the file names)")
+    pack.set_defaults(func=cmd_pack)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter() if args.log_json else
+                         logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, handlers=[handler])
+    if not args.verbose:
+        # Per-request metric events are DEBUG/INFO detail; keep the worker log to progress lines
+        logging.getLogger("bible_metrics").setLevel(logging.WARNING)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        log.error("%s", e)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
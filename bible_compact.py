@@ -0,0 +1,139 @@
+import sys
+from array import array
+
+# Item keys stored in typed columns; any other key (or a value that does not fit) goes to a sparse side table
+STRING_KEYS = ("type", "book", "symbol", "translation")
+INT_KEYS = ("chapter", "number")
+NONE = 0xFFFF
+
+
+class CompactPassage:
+    """Columnar, array-backed stand-in for the fetcher's list of item dicts.
+
+    Type, book, symbol and translation strings are interned once per container and stored as
+    2-byte codes, chapter/verse numbers as 2-byte ints, and all text in one UTF-8 buffer with
+    an offset array, so an item costs a few bytes of columns plus its text instead of a dict.
+
+    It is a read-only sequence of dicts: indexing and iteration rebuild each item (same keys,
+    same order) on demand, so json.dump(list(passage)), format_item and write_items work as before.
+    """
+
+    def __init__(self, items=()):
+        self._strings = []
+        self._string_ids = {}
+        self._layouts = []
+        self._layout_ids = {}
+        self._layout = array("B")
+        self._columns = {key: array("H") for key in STRING_KEYS + INT_KEYS}
+        self._text = bytearray()
+        self._offsets = array("L", [0])
+        self._extras = {}
+        self.extend(items)
+
+    @classmethod
+    def from_items(cls, items):
+        return items if isinstance(items, cls) else cls(items)
+
+    def _intern(self, value):
+        code = self._string_ids.get(value)
+        if code is None:
+            code = self._string_ids[value] = len(self._strings)
+            self._strings.append(sys.intern(value))
+        return code
+
+    def append(self, item):
+        index = len(self._layout)
+        keys = tuple(item)
+        layout = self._layout_ids.get(keys)
+        if layout is None:
+            layout = self._layout_ids[keys] = len(self._layouts)
+            self._layouts.append(keys)
+        self._layout.append(layout)
+        extra = {}
+        for key in STRING_KEYS:
+            value = item.get(key)
+            if value is None:
+                code = NONE
+            elif isinstance(value, str) and len(self._strings) < NONE:
+                code = self._intern(value)
+            else:
+                code = NONE
+                extra[key] = value
+            self._columns[key].append(code)
+        for key in INT_KEYS:
+            value = item.get(key)
+            if value is None:
+                code = NONE
+            elif type(value) is int and 0 <= value < NONE:
+                code = value
+            else:
+                code = NONE
+                extra[key] = value
+            self._columns[key].append(code)
+        text = item.get("text")
+        if isinstance(text, str):
+            self._text += text.encode("utf-8")
+        elif "text" in item:
+            extra["text"] = text
+        self._offsets.append(len(self._text))
+        for key in keys:
+            if key not in STRING_KEYS and key not in INT_KEYS and key != "text":
+                extra[key] = item[key]
+        if extra:
+            self._extras[index] = extra
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CompactPassage index out of range")
+        extra = self._extras.get(index, {})
+        item = {}
+        for key in self._layouts[self._layout[index]]:
+            if key in extra:
+                item[key] = extra[key]
+            elif key == "text":
+                item[key] = self._text[self._offsets[index]:self._offsets[index+1]].decode("utf-8")
+            else:
+                code = self._columns[key][index]
+                if code == NONE:
+                    item[key] = None
+                elif key in INT_KEYS:
+                    item[key] = code
+                else:
+                    item[key] = self._strings[code]
+        return item
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def type_of(self, index):
+        """Item type without building the dict."""
+        code = self._columns["type"][index]
+        return None if code == NONE else self._strings[code]
+
+    def count(self, item_type):
+        code = self._string_ids.get(item_type)
+        return 0 if code is None else self._columns["type"].count(code)
+
+    def to_dicts(self):
+        return list(self)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns and text buffer (excluding the interned strings and side table)."""
+        return (self._layout.itemsize * len(self._layout) + len(self._text) + self._offsets.itemsize * len(self._offsets)
+                + sum(column.itemsize * len(column) for column in self._columns.values()))
+
+    def __repr__(self):
+        return f"<CompactPassage {len(self)} items, {self.nbytes} bytes>"
@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import os
+
+from bible_archive import ARCHIVE_EXT, ArchiveWriter
+
+EXPORT_FORMATS = {
+    "json": ".json",         # pretty JSON array (converted from JSON Lines at the end)
+    "jsonl": ".jsonl",       # one compact item per line
+    "jsonl.gz": ".jsonl.gz",
+    "archive": ARCHIVE_EXT,  # packed verse archive (bible_archive), always one file per translation
+}
+
+
+def content_hash(items):
+    """Stable digest of a chapter's items (key order and whitespace do not matter)."""
+    data = json.dumps(items, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _open_text(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class JsonlWriter:
+    """Streams items to a JSON Lines file (gzip'd when the path ends in .gz)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = _open_text(path, "w")
+
+    def write_items(self, items):
+        for item in items:
+            self._file.write(json.dumps(item, ensure_ascii=False))
+            self._file.write("\n")
+        self.count += len(items)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def abort(self):
+        """Close and delete the file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path):
+    with _open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def jsonl_to_json(src, dst, indent=2):
+    """Convert JSON Lines to a pretty JSON array one item at a time (same layout as json.dump(..., indent=2))."""
+    pad = " " * indent
+    with open(dst, "w", encoding="utf-8") as out:
+        first = True
+        for item in iter_jsonl(src):
+            out.write("[\n" if first else ",\n")
+            body = json.dumps(item, ensure_ascii=False, indent=indent)
+            out.write("\n".join(pad + line for line in body.split("\n")))
+            first = False
+        out.write("[]" if first else "\n]")
+
+
+def write_items(path, items):
+    """Save items, picking the format from the extension (.json, .jsonl, .jsonl.gz)."""
+    if path.endswith(".jsonl") or path.endswith(".jsonl.gz"):
+        with JsonlWriter(path) as writer:
+            writer.write_items(items)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(items), f, ensure_ascii=False, indent=2)
+
+
+class BatchExporter:
+    """Writes a batch chapter by chapter, so memory stays flat however many books are selected.
+
+    Output is one file per book (Book_TRANSLATION.ext) or, with combined=True, one file per
+    translation (Bible_TRANSLATION.ext). The "json" format streams to a temporary .jsonl and is
+    converted to pretty JSON when its file is finished. The "archive" format keeps verse
+    texts only and always writes the combined file. Every file is written under a .part
+    name and moved into place only when finished, so a canceled or crashed batch never
+    leaves a truncated file under a final name: finish() completes the combined file of a
+    finished batch, abort() drops whatever is left unfinished.
+
+    With skip_unchanged=True every chapter's content_hash is kept in a ledger
+    (.hashes_TRANSLATION.json in the folder) and each file is written aside first: a file
+    whose chapters hash the same as last time is left untouched. changed and unchanged list
+    the finished files; changed_chapters counts chapters that are new or differ.
+    """
+
+    def __init__(self, folder, translation, fmt="json", combined=False, skip_unchanged=False):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.folder = folder
+        self.translation = translation
+        self.fmt = fmt
+        self.combined = combined or fmt == "archive"
+        self.skip_unchanged = skip_unchanged
+        self.changed = []
+        self.unchanged = []
+        self.changed_chapters = 0
+        self._writers = {}
+        self._hashes = {}
+        self._ledger_path = os.path.join(folder, f".hashes_{translation}.json")
+        self._ledger = {}
+        if skip_unchanged and os.path.exists(self._ledger_path):
+            with open(self._ledger_path, encoding="utf-8") as f:
+                self._ledger = json.load(f)
+
+    def _final_path(self, name):
+        return os.path.join(self.folder, f"{name.replace(' ', '_')}_{self.translation}{EXPORT_FORMATS[self.fmt]}")
+
+    def _part_path(self, name):
+        ext = ".jsonl" if self.fmt == "json" else EXPORT_FORMATS[self.fmt]
+        return os.path.join(self.folder, f"{name.replace(' ', '_')}_{self.translation}.part{ext}")
+
+    def _writer(self, name):
+        writer = self._writers.get(name)
+        if writer is None:
+            # Written aside and moved (or converted) into place when finished
+            path = self._part_path(name)
+            if self.fmt == "archive":
+                writer = ArchiveWriter(path, self.translation)
+            else:
+                writer = JsonlWriter(path)
+            self._writers[name] = writer
+        return writer
+
+    def _finish(self, name):
+        writer = self._writer(name)
+        writer.close()
+        del self._writers[name]
+        final = self._final_path(name)
+        entry = None
+        if self.skip_unchanged:
+            entry = {"file": os.path.basename(final), "chapters": self._hashes.pop(name, [])}
+            old = self._ledger.get(name) or {}
+            before = {(book, chapter): digest for book, chapter, digest in old.get("chapters", [])}
+            self.changed_chapters += sum(before.get((book, chapter)) != digest for book, chapter, digest in entry["chapters"])
+            if old == entry and os.path.exists(final):
+                os.remove(writer.path)
+                self.unchanged.append(final)
+                return final
+        if self.fmt == "json":
+            jsonl_to_json(writer.path, final)
+            os.remove(writer.path)
+        else:
+            os.replace(writer.path, final)
+        if entry is not None:
+            # Only once the file is in place, so a crash never leaves the ledger ahead of it
+            self._ledger[name] = entry
+            tmp = self._ledger_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._ledger, f, ensure_ascii=False)
+            os.replace(tmp, self._ledger_path)
+            self.changed.append(final)
+        return final
+
+    def write_chapter(self, book, chapter, items):
+        name = "Bible" if self.combined else book
+        self._writer(name).write_items(items)
+        if self.skip_unchanged:
+            self._hashes.setdefault(name, []).append([book, chapter, content_hash(items)])
+
+    def finish_book(self, book):
+        """Close a per-book file; returns its path (None in combined mode)."""
+        if self.combined:
+            return None
+        return self._finish(book)
+
+    def abort_book(self, book):
+        """Drop a per-book file that cannot be completed (its .part is deleted); no-op in combined mode."""
+        writer = self._writers.pop(book, None) if not self.combined else None
+        if writer is not None:
+            writer.abort()
+        self._hashes.pop(book, None)
+
+    def finish(self):
+        """Finish the combined file (if any) and return its path; only for a batch that completed."""
+        return self._finish("Bible") if self.combined and "Bible" in self._writers else None
+
+    def abort(self):
+        """Drop the .part file of everything not finished yet; finished files are kept. Safe after finish()."""
+        for writer in self._writers.values():
+            writer.abort()
+        self._writers.clear()
+
+    def report(self):
+        """Changed/unchanged summary of the files finished so far (meaningful with skip_unchanged)."""
+        return {"changed": len(self.changed), "unchanged": len(self.unchanged), "changed_chapters": self.changed_chapters,
+                "changed_files": [os.path.basename(path) for path in self.changed]}
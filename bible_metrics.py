@@ -0,0 +1,272 @@
+import json
+import logging
+import socket
+import threading
+import time
+from collections import deque
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+try:
+    from urllib3.util.connection import allowed_gai_family
+except ImportError:  # not public API; without it DNS is not timed apart from connect
+    allowed_gai_family = None
+
+log = logging.getLogger(__name__)
+
+COUNTERS = ("requests", "retries", "failures", "bytes", "not_modified", "cache_hits", "cache_misses", "store_hits", "chapter_hits", "pages", "items")
+# Seconds spent per phase: name resolution, TCP/TLS connect, waiting for the first byte,
+# reading the body, building the tree, walking it, rate-limit/politeness sleeps, retry backoff
+TIMERS = ("dns", "connect", "wait", "download", "parse", "extract", "rate_limit_sleep", "backoff_sleep")
+
+NO_BOOK = "(none)"
+
+
+def _new_totals():
+    return {**dict.fromkeys(COUNTERS, 0), **dict.fromkeys(TIMERS, 0.0)}
+
+
+# --- Connection timing (DNS and connect time per request) ---
+_timing = threading.local()
+
+
+def begin_request_timing():
+    """Reset this thread's DNS/connect accumulators before a request; returns them."""
+    _timing.phases = {"dns": 0.0, "connect": 0.0}
+    return _timing.phases
+
+
+def _phases():
+    return getattr(_timing, "phases", None) or begin_request_timing()
+
+
+class _TimedConnectionMixin:
+    """Times name resolution and connection setup (TCP + TLS) of each new pooled connection.
+
+    The host is resolved here so DNS can be timed on its own; the connect then goes to
+    each resolved address in turn, as urllib3 would. This leans on urllib3 internals
+    (HTTPConnection._dns_host and util.connection.allowed_gai_family), written for
+    urllib3 1.26 and 2.x; when either is missing the connection is made by urllib3 alone
+    and its DNS time is counted as connect time.
+    """
+
+    def _new_conn(self):
+        host = getattr(self, "_dns_host", None)
+        if host is None or allowed_gai_family is None:
+            return super()._new_conn()
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f"Failed to resolve {host!r}: {e}") from e
+        finally:
+            _phases()["dns"] += time.perf_counter() - started
+        error = None
+        try:
+            for *_, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        phases = _phases()
+        dns_before = phases["dns"]
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            phases["connect"] += time.perf_counter() - started - (phases["dns"] - dns_before)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections report DNS and connect time to begin_request_timing()."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+
+def _summarize(totals, elapsed=None):
+    summary = dict(totals)
+    for key in TIMERS:
+        summary[key] = round(summary[key], 6)
+    requests = totals["requests"]
+    lookups = totals["cache_hits"] + totals["cache_misses"]
+    network = totals["dns"] + totals["connect"] + totals["wait"] + totals["download"]
+    summary["avg_request_ms"] = round(network / requests * 1000, 3) if requests else None
+    summary["avg_bytes_per_request"] = round(totals["bytes"] / requests) if requests else None
+    summary["avg_parse_ms"] = round((totals["parse"] + totals["extract"]) / totals["pages"] * 1000, 3) if totals["pages"] else None
+    summary["cache_hit_ratio"] = round(totals["cache_hits"] / lookups, 4) if lookups else None
+    if elapsed is not None:
+        summary["elapsed_s"] = round(elapsed, 3)
+        summary["requests_per_sec"] = round(requests / elapsed, 3) if elapsed > 0 else None
+    return summary
+
+
+class FetchMetrics:
+    """Thread-safe counters and timings for one fetcher, rolled up overall and per book.
+
+    Every event is also logged (logger "bible_metrics") with its fields in record.fields,
+    so a JSON formatter can turn them into structured logs. reset() starts a new batch.
+    """
+
+    def __init__(self, window=30.0):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._totals = _new_totals()
+            self._books = {}
+            self._recent = deque()
+
+    def _add(self, book, **values):
+        with self._lock:
+            book_totals = self._books.get(book or NO_BOOK)
+            if book_totals is None:
+                book_totals = self._books[book or NO_BOOK] = _new_totals()
+            for totals in (self._totals, book_totals):
+                for key, value in values.items():
+                    totals[key] += value
+
+    @staticmethod
+    def _log(level, event, **fields):
+        if log.isEnabledFor(level):
+            text = " ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in fields.items())
+            log.log(level, "%s %s", event, text, extra={"event": event, "fields": fields})
+
+    # --- Events ---
+    def request(self, url, book, status, size, dns, connect, wait, download):
+        self._add(book, requests=1, bytes=size, not_modified=int(status == 304), dns=dns, connect=connect, wait=wait, download=download)
+        with self._lock:
+            self._recent.append(time.monotonic())
+        self._log(logging.INFO, "request", url=url, book=book, status=status, bytes=size,
+                  dns=dns, connect=connect, wait=wait, download=download)
+
+    def retry(self, url, book, attempt, wait, reason):
+        self._add(book, retries=1, backoff_sleep=wait)
+        self._log(logging.WARNING, "retry", url=url, book=book, attempt=attempt, wait=wait, reason=reason)
+
+    def failure(self, url, book, reason):
+        self._add(book, failures=1)
+        self._log(logging.ERROR, "failure", url=url, book=book, reason=reason)
+
+    def cache(self, url, book, hit):
+        self._add(book, **{"cache_hits" if hit else "cache_misses": 1})
+        self._log(logging.DEBUG, "cache_hit" if hit else "cache_miss", url=url, book=book)
+
+    def store_hit(self, book, chapter):
+        self._add(book, store_hits=1)
+        self._log(logging.DEBUG, "store_hit", book=book, chapter=chapter)
+
+    def chapter_hit(self, book, chapter):
+        self._add(book, chapter_hits=1)
+        self._log(logging.DEBUG, "chapter_hit", book=book, chapter=chapter)
+
+    def parse(self, book, seconds):
+        self._add(book, parse=seconds)
+
+    def extract(self, book, chapter, seconds, items):
+        self._add(book, pages=1, items=items, extract=seconds)
+        self._log(logging.DEBUG, "extract", book=book, chapter=chapter, seconds=seconds, items=items)
+
+    def sleep(self, book, seconds, reason):
+        if seconds > 0:
+            self._add(book, rate_limit_sleep=seconds)
+            self._log(logging.DEBUG, "sleep", book=book, seconds=seconds, reason=reason)
+
+    # --- Summaries ---
+    def requests_per_second(self):
+        """Requests sent over the last `window` seconds (or since reset, if sooner)."""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > self.window:
+                self._recent.popleft()
+            count = len(self._recent)
+        span = min(self.window, time.time() - self.started)
+        return count / span if span > 0 else 0.0
+
+    def totals(self):
+        with self._lock:
+            totals = dict(self._totals)
+        return _summarize(totals, time.time() - self.started)
+
+    def book_summary(self, book):
+        with self._lock:
+            totals = dict(self._books.get(book or NO_BOOK) or _new_totals())
+        return _summarize(totals)
+
+    def summary(self):
+        with self._lock:
+            books = {book: dict(totals) for book, totals in self._books.items()}
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "totals": self.totals(),
+            "books": {book: _summarize(totals) for book, totals in books.items()},
+        }
+
+    def log_book(self, book):
+        self._log(logging.INFO, "book_summary", book=book, **self.book_summary(book))
+
+    # --- Export ---
+    def to_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self, path):
+        """Write the per-book counters in the Prometheus text exposition format (for node_exporter's textfile collector)."""
+        with self._lock:
+            books = {book: dict(totals) for book, totals in self._books.items()}
+        lines = []
+        for key in COUNTERS:
+            name = f"scripture_{key}_total"
+            lines += [f"# TYPE {name} counter"]
+            lines += [f'{name}{{book="{_label(book)}"}} {totals[key]}' for book, totals in sorted(books.items())]
+        lines += ["# HELP scripture_seconds_total Seconds spent per phase", "# TYPE scripture_seconds_total counter"]
+        for key in TIMERS:
+            lines += [f'scripture_seconds_total{{book="{_label(book)}",phase="{key}"}} {totals[key]:.6f}'
+                      for book, totals in sorted(books.items())]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per log line; metric events carry their fields."""
+
+    def format(self, record):
+        entry = {"time": self.formatTime(record), "level": record.levelname, "logger": record.name}
+        if hasattr(record, "event"):
+            entry["event"] = record.event
+            entry.update(record.fields)
+        else:
+            entry["message"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False, default=str)
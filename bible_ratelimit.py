@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that talks to the site.
+
+    rate is the sustained requests per second; burst is how many requests may go
+    out back-to-back after an idle spell.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst)
+        self.total_wait = 0.0
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1, sleep=None):
+        """Block until tokens are available; returns the seconds spent waiting.
+
+        sleep replaces time.sleep for the waits (e.g. CancelToken.sleep, to stay cancellable).
+        """
+        sleep = sleep or time.sleep
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.total_wait += waited
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            sleep(wait)
+            waited += wait
+
+    # A fixed-rate bucket ignores the fetcher's feedback; AdaptiveRateLimiter acts on it
+    def on_success(self, seconds):
+        pass
+
+    def on_backoff(self, retry_after=None):
+        return self.rate
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket whose rate follows the server's answers (additive increase, multiplicative decrease).
+
+    Every quick, successful response raises the rate by `increase` requests/second, up to
+    max_rate; a slow one (over slow_after seconds) holds it. A push-back (429, 503, other
+    5xx or a dropped connection) multiplies it by `decrease`, down to min_rate, and a
+    Retry-After stops every thread sharing the limiter until it has passed. Only requests
+    that go to the network acquire a token, so cache and store hits never wait.
+    """
+
+    def __init__(self, rate=1.0, min_rate=0.1, max_rate=4.0, burst=1, increase=0.05, decrease=0.5, slow_after=2.0):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("need 0 < min_rate <= max_rate")
+        super().__init__(min(max(rate, min_rate), max_rate), burst)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_after = slow_after
+        self.backoffs = 0
+        self._blocked_until = 0.0
+
+    def acquire(self, tokens=1, sleep=None):
+        waited = 0.0
+        while True:
+            with self._lock:
+                blocked = self._blocked_until - time.monotonic()
+            if blocked <= 0:
+                break
+            (sleep or time.sleep)(blocked)
+            waited += blocked
+        if waited:
+            with self._lock:
+                self.total_wait += waited
+        return waited + super().acquire(tokens, sleep)
+
+    def on_success(self, seconds):
+        """A response that was not pushed back; seconds is how long it took."""
+        with self._lock:
+            if seconds <= self.slow_after:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_backoff(self, retry_after=None):
+        """The server pushed back: cut the rate and, with Retry-After, hold everyone off until then."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            self._last = time.monotonic()
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, self._last + retry_after)
+            self.backoffs += 1
+            return self.rate
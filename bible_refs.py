@@ -0,0 +1,208 @@
+import re
+from bible_verse_fetcher import BibleGatewayFetcher, CANONICAL_BOOKS, DEUTERO_BOOKS
+from bible_versification import chapter_count, chapter_numbers, verse_count
+
+# Common abbreviations (SBL style plus the usual short forms). Full names and any
+# unambiguous prefix of a full name ("Gen", "Philem") resolve without being listed here.
+ABBREVIATIONS = {
+    "Genesis": ["Gn", "Ge"], "Exodus": ["Ex", "Exo", "Exod"], "Leviticus": ["Lv", "Le"],
+    "Numbers": ["Nm", "Nb", "Nu"], "Deuteronomy": ["Dt", "De", "Deut"], "Joshua": ["Jos", "Jsh"],
+    "Judges": ["Jdg", "Jg", "Jdgs", "Judg"], "Ruth": ["Rth", "Ru"],
+    "1 Samuel": ["1 Sm", "1 Sa"], "2 Samuel": ["2 Sm", "2 Sa"],
+    "1 Kings": ["1 Kgs", "1 Ki"], "2 Kings": ["2 Kgs", "2 Ki"],
+    "1 Chronicles": ["1 Ch", "1 Chr"], "2 Chronicles": ["2 Ch", "2 Chr"],
+    "Esther": ["Es", "Est", "Esth"], "Job": ["Jb"], "Psalms": ["Ps", "Psa", "Pss", "Psm", "Pslm", "Psalm"],
+    "Proverbs": ["Pr", "Prv", "Pro"], "Ecclesiastes": ["Ec", "Eccl", "Qoh"],
+    "Song of Solomon": ["Song", "Sg", "SoS", "Song of Songs", "Cant", "Canticles"],
+    "Isaiah": ["Is", "Isa"], "Jeremiah": ["Jr", "Je", "Jer"], "Lamentations": ["La", "Lam"],
+    "Ezekiel": ["Ezk", "Eze", "Ezek"], "Daniel": ["Dn", "Da"], "Hosea": ["Ho", "Hos"], "Joel": ["Jl"],
+    "Amos": ["Am"], "Obadiah": ["Ob", "Obad"], "Jonah": ["Jon", "Jnh"], "Micah": ["Mc", "Mic"],
+    "Nahum": ["Na", "Nah"], "Habakkuk": ["Hb", "Hab"], "Zephaniah": ["Zp", "Zep", "Zeph"],
+    "Haggai": ["Hg", "Hag"], "Zechariah": ["Zc", "Zec", "Zech"], "Malachi": ["Ml", "Mal"],
+    "Matthew": ["Mt", "Mat", "Matt"], "Mark": ["Mk", "Mrk", "Mar"], "Luke": ["Lk", "Luk"],
+    "John": ["Jn", "Jhn", "Joh"], "Acts": ["Ac"], "Romans": ["Rm", "Ro", "Rom"],
+    "1 Corinthians": ["1 Co", "1 Cor"], "2 Corinthians": ["2 Co", "2 Cor"], "Galatians": ["Ga", "Gal"],
+    "Ephesians": ["Eph", "Ephes"], "Philippians": ["Php", "Pp", "Phil"], "Colossians": ["Col"],
+    "1 Thessalonians": ["1 Th", "1 Thes", "1 Thess"], "2 Thessalonians": ["2 Th", "2 Thes", "2 Thess"],
+    "1 Timothy": ["1 Ti", "1 Tim"], "2 Timothy": ["2 Ti", "2 Tim"], "Titus": ["Tit"],
+    "Philemon": ["Phm", "Phlm", "Philem"], "Hebrews": ["Heb"], "James": ["Jas", "Jm"],
+    "1 Peter": ["1 Pe", "1 Pt", "1 Pet"], "2 Peter": ["2 Pe", "2 Pt", "2 Pet"],
+    "1 John": ["1 Jn", "1 Jhn", "1 Jo"], "2 John": ["2 Jn", "2 Jhn", "2 Jo"], "3 John": ["3 Jn", "3 Jhn", "3 Jo"],
+    "Jude": ["Jud", "Jd"], "Revelation": ["Rv", "Re", "Rev", "Revelations", "Apocalypse"],
+    "Tobit": ["Tb", "Tob"], "Judith": ["Jdt", "Jth"], "Additions to Esther": ["Add Esth", "Add Es", "Greek Esther"],
+    "Wisdom": ["Wis", "Wisd", "Wisdom of Solomon"], "Sirach": ["Sir", "Ecclus", "Ecclesiasticus"], "Baruch": ["Bar"],
+    "Letter of Jeremiah": ["Let Jer", "Ep Jer", "LJe"], "Prayer of Azariah": ["Pr Azar", "Song of Three"],
+    "Susanna": ["Sus"], "Bel and the Dragon": ["Bel"], "1 Maccabees": ["1 Macc", "1 Mac", "1 Ma"],
+    "2 Maccabees": ["2 Macc", "2 Mac", "2 Ma"], "1 Esdras": ["1 Esd"], "2 Esdras": ["2 Esd"],
+    "Prayer of Manasseh": ["Pr Man", "Man"],
+}
+
+_ORDINALS = {"i": "1", "ii": "2", "iii": "3", "first": "1", "second": "2", "third": "3", "1st": "1", "2nd": "2", "3rd": "3"}
+_ORDINAL_RE = re.compile(r"^(iii|ii|i|first|second|third|1st|2nd|3rd)\s+", re.IGNORECASE)
+
+
+def _key(name):
+    name = _ORDINAL_RE.sub(lambda m: _ORDINALS[m.group(1).lower()], name.strip())
+    return re.sub(r"[\s.]+", "", name).lower()
+
+
+BOOK_KEYS = {}
+for _book in CANONICAL_BOOKS + DEUTERO_BOOKS:
+    BOOK_KEYS[_key(_book)] = _book
+    for _abbrev in ABBREVIATIONS.get(_book, []):
+        BOOK_KEYS.setdefault(_key(_abbrev), _book)
+
+
+def resolve_book(name):
+    """Canonical book name for a full name, abbreviation or unambiguous prefix; None if unknown or ambiguous."""
+    key = _key(name)
+    if not key:
+        return None
+    if key in BOOK_KEYS:
+        return BOOK_KEYS[key]
+    matches = {book for book in CANONICAL_BOOKS + DEUTERO_BOOKS if _key(book).startswith(key)}
+    return matches.pop() if len(matches) == 1 else None
+
+
+class Reference:
+    """One chapter slice: a whole chapter (verse_start None) or verses verse_start..verse_end of it."""
+    __slots__ = ("book", "chapter", "verse_start", "verse_end")
+
+    def __init__(self, book, chapter, verse_start=None, verse_end=None):
+        self.book = book
+        self.chapter = chapter
+        self.verse_start = verse_start
+        self.verse_end = verse_end if verse_end is not None else verse_start
+
+    def _key(self):
+        return (self.book, self.chapter, self.verse_start, self.verse_end)
+
+    def __eq__(self, other):
+        return isinstance(other, Reference) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Reference({str(self)!r})"
+
+    def __str__(self):
+        if self.verse_start is None:
+            return f"{self.book} {self.chapter}"
+        if self.verse_end == self.verse_start:
+            return f"{self.book} {self.chapter}:{self.verse_start}"
+        return f"{self.book} {self.chapter}:{self.verse_start}-{self.verse_end}"
+
+    def slice(self, items):
+        """This reference's part of its chapter's items: all of them, or just the verses in range."""
+        if self.verse_start is None:
+            return list(items)
+        return [item for item in items
+                if item["type"] == "verse" and item.get("number") is not None and self.verse_start <= item["number"] <= self.verse_end]
+
+
+_PART_RE = re.compile(r"^\s*((?:(?:[123]|iii|ii|i|1st|2nd|3rd|first|second|third)\s*)?[^\W\d][^\d]*?)?\s*([\d][\d\s:,.\-–—]*)?\s*$", re.IGNORECASE)
+_RANGE_RE = re.compile(r"^(\d+)(?::(\d+))?(?:-(\d+)(?::(\d+))?)?$")
+
+
+def _chapter_end(book, chapter):
+    return verse_count(book, chapter) or BibleGatewayFetcher.MAX_VERSES
+
+
+def _parse_numbers(book, numbers, references):
+    """Append the References for the numbers part of one reference ("3:16-18, 20", "1-3", "8:28-30, 38")."""
+    single_chapter = chapter_count(book) == 1
+    if single_chapter and re.sub(r"\s+", "", numbers) == "1":
+        # "Jude 1" is the whole (only) chapter, as on the site
+        references.append(Reference(book, 1))
+        return
+    chapter = None      # set once a chapter:verse has been seen; bare numbers after it are verses
+    for piece in numbers.split(","):
+        piece = re.sub(r"\s+", "", piece).replace("–", "-").replace("—", "-").replace(".", ":")
+        if not piece:
+            continue
+        m = _RANGE_RE.match(piece)
+        if not m:
+            raise ValueError(f"Cannot read {piece!r}")
+        a, b, c, d = (int(g) if g else None for g in m.groups())
+        if b is None and (chapter is not None or single_chapter):
+            # Bare verse (or verse range) in the current chapter; "Jude 3" is verse 3 of chapter 1
+            if d is not None:
+                raise ValueError(f"Cannot read {piece!r}")
+            chapter = chapter or 1
+            references.append(Reference(book, chapter, a, c or a))
+        elif b is None:
+            # Chapter or chapter range: "Gen 1", "Gen 1-3" ("Gen 1-2:3" ends part-way into 2)
+            last = c or a
+            for ch in range(a, last if d is not None else last + 1):
+                references.append(Reference(book, ch))
+            if d is not None:
+                references.append(Reference(book, last, 1, d))
+                chapter = last
+        elif d is None:
+            # "3:16", "3:16-18"
+            chapter = a
+            references.append(Reference(book, a, b, c or b))
+        else:
+            # "3:16-4:2" crosses chapters: the rest of 3, any whole chapters between, then 4:1-2
+            references.append(Reference(book, a, b, _chapter_end(book, a)))
+            for ch in range(a + 1, c):
+                references.append(Reference(book, ch))
+            references.append(Reference(book, c, 1, d))
+            chapter = c
+
+
+def parse_references(text, errors=None):
+    """Parse free-text references ("Jn 3:16; Rom 8:28-30, 38; Ps 23; 24") into a list of References.
+
+    References are separated by ";" or new lines; a part without a book continues the previous
+    book ("Ps 23; 24"). Unreadable parts raise ValueError, or are reported in errors (a list)
+    and skipped if one is given.
+    """
+    references = []
+    book = None
+    for part in re.split(r"[;\n]+", text):
+        if not part.strip():
+            continue
+        try:
+            m = _PART_RE.match(part)
+            if not m:
+                raise ValueError(f"Cannot read {part.strip()!r}")
+            name, numbers = m.groups()
+            if name and name.strip():
+                book = resolve_book(name)
+                if book is None:
+                    raise ValueError(f"Unknown book {name.strip()!r}")
+                if not numbers and chapter_numbers(book):
+                    # A bare book name is the whole book
+                    references.extend(Reference(book, chapter) for chapter in chapter_numbers(book))
+                    continue
+            elif book is None:
+                raise ValueError(f"No book given for {part.strip()!r}")
+            if not numbers:
+                raise ValueError(f"No chapter given for {part.strip()!r}")
+            _parse_numbers(book, numbers, references)
+        except ValueError as e:
+            if errors is None:
+                raise
+            errors.append(str(e))
+    return references
+
+
+def chapters_needed(references):
+    """{book: sorted chapter numbers} covering every reference, each chapter once."""
+    needed = {}
+    for ref in references:
+        needed.setdefault(ref.book, set()).add(ref.chapter)
+    return {book: sorted(chapters) for book, chapters in needed.items()}
+
+
+def chapter_runs(chapters, max_length):
+    """Split sorted chapter numbers into runs of consecutive chapters, each at most max_length long."""
+    runs = []
+    for chapter in chapters:
+        if runs and chapter == runs[-1][-1] + 1 and len(runs[-1]) < max_length:
+            runs[-1].append(chapter)
+        else:
+            runs.append([chapter])
+    return runs
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from bible_export import content_hash
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".scripture_scrapeway", "verses.sqlite3")
+
+
+def split_by_chapter(items):
+    """Group a book's item list into {(book, chapter): items}.
+
+    Non-verse items belong to the chapter of the next verse (trailing ones to the last),
+    the same rule the fetcher uses when splitting multi-chapter pages.
+    """
+    chapters = {}
+    pending = []
+    current = None
+    for item in items:
+        if item.get("type") == "verse" and item.get("chapter") is not None:
+            current = (item.get("book"), item["chapter"])
+            chapters.setdefault(current, []).extend(pending)
+            chapters[current].append(item)
+            pending = []
+        else:
+            pending.append(item)
+    if pending and current is not None:
+        chapters[current].extend(pending)
+    return chapters
+
+
+class VerseStore:
+    """Local SQLite store of fetched chapters with an FTS5 index over the text.
+
+    Whole chapters are stored item by item (the item dict round-trips exactly), keyed by
+    translation/book/chapter/sequence with the verse number alongside, so the fetcher can
+    answer chapter, verse and range requests without touching the network.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS chapters (
+                translation TEXT NOT NULL,
+                book TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                hash TEXT,
+                PRIMARY KEY (translation, book, chapter)
+            );
+            CREATE TABLE IF NOT EXISTS items (
+                translation TEXT NOT NULL,
+                book TEXT NOT NULL,
+                chapter INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                number INTEGER,
+                text TEXT,
+                data TEXT NOT NULL,
+                UNIQUE (translation, book, chapter, seq)
+            );
+            CREATE INDEX IF NOT EXISTS items_verse ON items(translation, book, chapter, number);
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                text, content='items', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items
+            WHEN new.type IN ('verse', 'heading', 'section', 'footnote') BEGIN
+                INSERT INTO items_fts(rowid, text) VALUES (new.rowid, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items
+            WHEN old.type IN ('verse', 'heading', 'section', 'footnote') BEGIN
+                INSERT INTO items_fts(items_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+            END;
+        """)
+        if "hash" not in {row[1] for row in self._db.execute("PRAGMA table_info(chapters)")}:
+            # Stores from before chapter hashes were kept
+            self._db.execute("ALTER TABLE chapters ADD COLUMN hash TEXT")
+        self._db.commit()
+
+    # --- Writing ---
+    def ingest_chapter(self, translation, book, chapter, items):
+        """Store (or replace) one complete chapter; False if it was already stored with the same content."""
+        with self._lock:
+            changed = self._replace_chapter(translation, book, chapter, items)
+            self._db.commit()
+        return changed
+
+    def ingest_items(self, translation, items, book=None):
+        """Store a book's (or several books') flat item list, e.g. a Book_TRANSLATION.json export."""
+        with self._lock:
+            for (item_book, chapter), ch_items in split_by_chapter(items).items():
+                self._replace_chapter(translation, item_book or book, chapter, ch_items)
+            self._db.commit()
+
+    def _replace_chapter(self, translation, book, chapter, items):
+        key = (translation, book, int(chapter))
+        digest = content_hash(items)
+        row = self._db.execute("SELECT hash FROM chapters WHERE translation = ? AND book = ? AND chapter = ?", key).fetchone()
+        if row is not None and row[0] == digest:
+            return False    # unchanged: leave the rows (and the FTS index) alone
+        self._db.execute("DELETE FROM items WHERE translation = ? AND book = ? AND chapter = ?", key)
+        self._db.executemany(
+            "INSERT INTO items (translation, book, chapter, seq, type, number, text, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [key + (seq, item["type"], item.get("number"), item.get("text"), json.dumps(item, ensure_ascii=False))
+             for seq, item in enumerate(items)])
+        self._db.execute("INSERT OR REPLACE INTO chapters (translation, book, chapter, stored_at, hash) VALUES (?, ?, ?, ?, ?)",
+                         key + (time.time(), digest))
+        return True
+
+    def import_file(self, path, translation=None):
+        """Ingest a saved .json/.jsonl(.gz) export; translation defaults to the _TRANSLATION filename suffix."""
+        from bible_export import iter_jsonl
+        if translation is None:
+            m = re.search(r"_([A-Za-z0-9]+)\.json", os.path.basename(path))
+            if not m:
+                raise ValueError(f"Cannot tell the translation of {path}")
+            translation = m.group(1)
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                items = json.load(f)
+        else:
+            items = list(iter_jsonl(path))
+        self.ingest_items(translation, items)
+        return translation
+
+    # --- Reading ---
+    def has_chapter(self, translation, book, chapter):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM chapters WHERE translation = ? AND book = ? AND chapter = ?",
+                                    (translation, book, int(chapter))).fetchone() is not None
+
+    def chapter_hash(self, translation, book, chapter):
+        """content_hash of a stored chapter's items, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM chapters WHERE translation = ? AND book = ? AND chapter = ?",
+                                   (translation, book, int(chapter))).fetchone()
+        return row[0] if row else None
+
+    def get_chapter(self, translation, book, chapter):
+        """All items of a stored chapter in page order, or None if it has not been stored."""
+        if not self.has_chapter(translation, book, chapter):
+            return None
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM items WHERE translation = ? AND book = ? AND chapter = ? ORDER BY seq",
+                                    (translation, book, int(chapter))).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get_verses(self, translation, book, chapter, verse_start, verse_end=None):
+        """Verse items verse_start..verse_end of a stored chapter, or None if it has not been stored."""
+        if not self.has_chapter(translation, book, chapter):
+            return None
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM items WHERE translation = ? AND book = ? AND chapter = ? AND type = 'verse' "
+                "AND number BETWEEN ? AND ? ORDER BY seq",
+                (translation, book, int(chapter), int(verse_start), int(verse_end or verse_start))).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def translations(self):
+        with self._lock:
+            return [t for (t,) in self._db.execute("SELECT DISTINCT translation FROM chapters ORDER BY translation")]
+
+    def search(self, query, translation=None, types=("verse",), limit=200):
+        """Full-text search; words match anywhere, "quoted phrases" match exactly.
+
+        Returns the stored items, best match first, each with a "translation" key added.
+        """
+        sql = ("SELECT items.translation, items.data FROM items_fts JOIN items ON items.rowid = items_fts.rowid "
+               "WHERE items_fts MATCH ?")
+        args = []
+        if translation:
+            sql += " AND items.translation = ?"
+            args.append(translation)
+        if types:
+            sql += f" AND items.type IN ({', '.join('?' * len(types))})"
+            args.extend(types)
+        sql += " ORDER BY items_fts.rank LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            try:
+                rows = self._db.execute(sql, [query] + args).fetchall()
+            except sqlite3.OperationalError:
+                # Not valid FTS5 syntax (stray quote, operator, punctuation): search the plain words
+                words = re.findall(r"\w+", query)
+                if not words:
+                    return []
+                rows = self._db.execute(sql, [" ".join(f'"{w}"' for w in words)] + args).fetchall()
+        results = []
+        for tr, data in rows:
+            item = json.loads(data)
+            item.setdefault("translation", tr)
+            results.append(item)
+        return results
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,189 @@
+import re
+
+# Elements that never have an end tag
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+# Elements whose content is raw text, skipped whole
+RAW_TEXT_ELEMENTS = {"script", "style", "textarea", "title"}
+
+_TAG_RE = re.compile(r"""<(/?)([a-zA-Z][^\s/>]*)((?:[^>"']|"[^"]*"|'[^']*')*)>""")
+_SAME_TAG_RES = {}
+_CLASS_RE = re.compile(r"""(?:^|\s)class\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+
+
+def makes_item(tag, classes):
+    """True for the elements BibleGatewayFetcher._collect_items turns into items (headings, sections,
+    verses, footnotes, cross-references, paragraphs); everything it walks through is inside one of them."""
+    return (tag in ("h2", "h3", "p") or "section-head" in classes
+            or (tag == "span" and ("text" in classes or "footnote" in classes or "crossreference" in classes)))
+
+
+def _same_tag_re(tag):
+    # Start or end tags of one name only: all that matters inside an item element is where it ends
+    pattern = _SAME_TAG_RES.get(tag)
+    if pattern is None:
+        pattern = _SAME_TAG_RES[tag] = re.compile(rf"""<(/?){re.escape(tag)}(?=[\s/>])((?:[^>"']|"[^"]*"|'[^']*')*)>""", re.IGNORECASE)
+    return pattern
+
+
+def _classes(attrs):
+    m = _CLASS_RE.search(attrs)
+    return (m.group(1) or m.group(2) or m.group(3) or "").split() if m else ()
+
+
+class PassageScanner:
+    """Cuts the passage container out of HTML fed a chunk at a time, one item element at a time.
+
+    feed() returns the markup of every outermost item element inside the container that
+    closed in that chunk, in document order, sliced straight from the page; parsed and
+    walked in order they give the same items as walking the whole container. Once the
+    container itself closes, done is True and the rest of the page can be left unread.
+
+    Only tags are looked at (comments and script/style bodies are skipped), with a stack
+    of the open elements around the item elements; inside an item element only tags of
+    its own name are counted to find its end, and the markup is left to the real parser.
+
+    The container is the first div.passage-content, or a div.passage-text without one
+    inside it (the same choice as BibleGatewayFetcher._find_passage). html holds the
+    whole page read so far while no container has been found (so a search page can
+    still be parsed the usual way), and all along with keep_html=True.
+    """
+
+    def __init__(self, keep_html=False):
+        self.keep_html = keep_html
+        self.found = False
+        self.done = False
+        self._chunks = []
+        self._buffer = ""
+        self._pos = 0
+        self._stack = []          # open tags from the container down
+        self._tentative = False   # container is a passage-text that may still hold a passage-content
+        self._held = []           # fragments of a tentative container
+        self._capture = None      # buffer offset where the item element being read starts
+        self._capture_tag = None
+        self._capture_open = 0    # its nesting depth of same-name elements
+        self._ready = []
+
+    @property
+    def html(self):
+        return "".join(self._chunks)
+
+    def feed(self, data):
+        if self.done:
+            return []
+        if self.keep_html or not self.found:
+            self._chunks.append(data)
+        self._buffer += data
+        self._scan(final=False)
+        if self.found and not self.keep_html:
+            self._chunks = []
+        # Keep only what is still needed: the open item element, or the unscanned tail
+        keep = self._pos if self._capture is None else self._capture
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._pos -= keep
+            if self._capture is not None:
+                self._capture = 0
+        ready, self._ready = self._ready, []
+        return ready
+
+    def keep_tail(self, data):
+        """Page text read after the container closed: not scanned, only added to html with keep_html=True."""
+        if self.keep_html:
+            self._chunks.append(data)
+
+    def close(self):
+        """End of the page: anything still open in the container is returned as it stands."""
+        if not self.done:
+            self._scan(final=True)
+            if self._capture is not None:
+                self._emit(self._buffer[self._capture:])
+                self._capture = None
+            if self._tentative:
+                self._ready.extend(self._held)
+        ready, self._ready = self._ready, []
+        return ready
+
+    def _emit(self, fragment):
+        (self._held if self._tentative else self._ready).append(fragment)
+
+    def _scan(self, final):
+        buffer = self._buffer
+        pos = self._pos
+        while not self.done:
+            if self._capture is not None:
+                m = _same_tag_re(self._capture_tag).search(buffer, pos)
+                if m is None:
+                    # Rescan from the last "<": it may open a tag the next chunk completes
+                    last = buffer.rfind("<", pos)
+                    pos = last if last >= 0 else len(buffer)
+                    break
+                pos = m.end()
+                if m.group(1):
+                    self._capture_open -= 1
+                    if self._capture_open == 0:
+                        self._emit(buffer[self._capture:pos])
+                        self._capture = None
+                elif not m.group(2).rstrip().endswith("/"):
+                    self._capture_open += 1
+                continue
+            start = buffer.find("<", pos)
+            if start < 0:
+                pos = len(buffer)
+                break
+            if buffer.startswith("<!--", start):
+                end = buffer.find("-->", start + 4)
+                if end < 0:
+                    break
+                pos = end + 3
+                continue
+            m = _TAG_RE.match(buffer, start)
+            if m is None:
+                if buffer.find(">", start) < 0 and not final:
+                    break           # tag cut off by the chunk boundary
+                pos = start + 1     # a stray "<" in text
+                continue
+            pos = m.end()
+            closing, tag, attrs = m.group(1), m.group(2).lower(), m.group(3)
+            if closing:
+                self._end_tag(tag)
+                continue
+            if tag in RAW_TEXT_ELEMENTS and not attrs.rstrip().endswith("/"):
+                end = buffer.lower().find(f"</{tag}", pos)
+                if end < 0:
+                    pos = start     # wait for the end of the script
+                    break
+                pos = end
+                continue
+            self._start_tag(tag, _classes(attrs), start, attrs.rstrip().endswith("/"))
+        self._pos = pos
+
+    def _start_tag(self, tag, classes, start, self_closing):
+        if tag == "div" and ("passage-content" in classes or (not self.found and "passage-text" in classes)):
+            if not self.found or self._tentative:
+                # A passage-content always wins over the passage-text around it
+                self.found = True
+                self._tentative = "passage-content" not in classes
+                self._held = []
+                self._capture = None
+                self._stack = [tag]
+                return
+        if not self.found or tag in VOID_ELEMENTS or self_closing:
+            return
+        if makes_item(tag, classes):
+            self._capture = start
+            self._capture_tag = tag
+            self._capture_open = 1
+            return
+        self._stack.append(tag)
+
+    def _end_tag(self, tag):
+        if not self.found or tag not in self._stack:
+            return
+        # Unclosed tags inside are closed along with it, as a tree builder would
+        while self._stack and self._stack.pop() != tag:
+            pass
+        if not self._stack:
+            if self._tentative:
+                self._ready.extend(self._held)
+                self._held = []
+            self.done = True
@@ -1,7 +1,26 @@
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, CData, NavigableString, SoupStrainer, Tag
+import logging
 import re
+import threading
 import time
+from functools import lru_cache, wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+from bible_versification import chapter_numbers
+from bible_metrics import FetchMetrics, TimedHTTPAdapter, begin_request_timing
+from bible_ratelimit import AdaptiveRateLimiter
+from bible_cancel import Canceled
+from bible_stream import PassageScanner
+
+log = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401  (optional, much faster tree builder)
+    HAVE_LXML = True
+except ImportError:
+    HAVE_LXML = False
 
 # --- Canonical and Deuterocanonical Books ---
 CANONICAL_BOOKS = [
@@ -59,6 +78,62 @@ TRANSLATION_CODES = {
     "GNV": {"label": "Geneva Bible", "supports_apocrypha": True}
 }
 
+# Containers worth building a tree for when parsing in "passage only" mode
+# (passage-col wraps each version's passage on multi-version pages)
+PASSAGE_CONTAINER_CLASSES = {"passage-col", "passage-text", "passage-content", "search-result-list"}
+
+def _call_options(method):
+    """Give a fetch method token= and refresh= keywords that hold for the whole call on this thread
+    (every request, sleep and chapter it goes through): token is a bible_cancel.CancelToken the call
+    can be paused or canceled with, refresh overrides the fetcher's refresh setting for this call only."""
+    @wraps(method)
+    def wrapper(self, *args, token=None, refresh=None, **kwargs):
+        if token is None and refresh is None:
+            return method(self, *args, **kwargs)
+        previous = self._enter_options(token, refresh)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._local.token, self._local.refresh = previous
+    return wrapper
+
+
+_END = object()
+
+
+class _Abandoned(Exception):
+    """A request given up because its CancelToken was paused or canceled."""
+
+
+def _close_abandoned(future):
+    # Done callback of an abandoned request: nobody reads its response, so free the connection
+    if not future.cancelled() and future.exception() is None:
+        future.result()[0].close()
+
+
+# The strings get_text() reads; comments, doctypes and script/style bodies are other subclasses
+_TEXT_TYPES = (NavigableString, CData)
+_VERSE_CLASS_RE = re.compile(r'([1-3]?[A-Za-z]+(?:-[A-Za-z]+)*)(?:-(\d+))?(?:-(\d+))?')
+
+
+@lru_cache(maxsize=1 << 16)
+def _class_info(classes):
+    """(class set, chapter, verse) for a tuple of class names; chapter and verse come from
+    the first Book-Chapter-Verse class and are None without one. Pages repeat the same few
+    class lists, so each is parsed once."""
+    for cls in classes:
+        m = _VERSE_CLASS_RE.match(cls)
+        if m and m.group(3):
+            return frozenset(classes), int(m.group(2)), int(m.group(3))
+    return frozenset(classes), None, None
+
+
+def _is_passage_container(class_value):
+    # bs4 may hand us one class or the whole space-separated attribute
+    return class_value is not None and not PASSAGE_CONTAINER_CLASSES.isdisjoint(class_value.split())
+
+PASSAGE_STRAINER = SoupStrainer("div", class_=_is_passage_container)
+
 def normalize_book_name(book):
     """Use spaces for BibleGateway passage search (no + sign)"""
     return book.strip()
@@ -68,18 +143,132 @@ class BibleGatewayFetcher:
     MAX_CHAPTERS = 150
     MAX_VERSES = 200
 
-    def __init__(self, user_agent: str = None, delay_between_requests=1.5):
+    # 429 and 5xx are retried (after Retry-After, when given) and slow an adaptive limiter down
+    RETRY_STATUSES = frozenset([429, *range(500, 600)])
+    MAX_RETRY_AFTER = 300
+    # Ceiling for the limiter built from delay_between_requests
+    DEFAULT_MAX_RATE = 2.0
+    # Streaming: characters decoded per read, and how much unread page after the passage is
+    # still read off the socket (unparsed) to keep the connection; a longer tail drops it
+    STREAM_CHUNK_SIZE = 8192
+    STREAM_DRAIN_BYTES = 64 * 1024
+
+    def __init__(self, user_agent: str = None, delay_between_requests=1.5, timeout=(5, 30),
+                 max_retries=3, backoff_factor=0.5, pool_size=10, session=None, cache=None, offline=False,
+                 parser="auto", passage_only=True, rate_limiter=None, store=None, metrics=None, streaming=False,
+                 archives=None, refresh=False, chapter_cache=None):
         self.headers = {
             "User-Agent": user_agent or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
         }
-        self.delay = delay_between_requests
+        # (connect, read) seconds; a stalled socket must never hang a batch thread
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        # --- Pooled keep-alive session (one TCP/TLS handshake per host, not per chapter) ---
+        if session is None:
+            session = requests.Session()
+            adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        self.session = session
+        # Requests sent under a CancelToken run here, at most one per pooled connection
+        self.pool_size = pool_size
+        self._sender = None
+        self._sender_lock = threading.Lock()
+
+        # "auto" picks lxml when installed, else the pure-Python html.parser.
+        # passage_only builds the tree for the passage/search containers only (no site chrome/scripts).
+        if parser == "auto":
+            parser = "lxml" if HAVE_LXML else "html.parser"
+        self.parser = parser
+        self.passage_only = passage_only
+        # streaming=True makes fetch_entire_chapter parse the page while it downloads (see iter_chapter)
+        self.streaming = streaming
+
+        # Optional bible_cache.ResponseCache; offline=True answers from it only
+        self.cache = cache
+        self.offline = offline
+        # refresh=True re-checks every page with the site: the verse store and archives are not
+        # read, and cached pages are revalidated with conditional requests (If-None-Match /
+        # If-Modified-Since), so an unchanged page costs a 304 and is parsed from the cache.
+        # A fetch call's refresh= keyword overrides it for that call alone
+        self.refresh = refresh
+        self._local = threading.local()
+        # Optional bible_store.VerseStore: answers from stored chapters first, keeps every chapter fetched
+        self.store = store
+        # Optional bible_cache.ChapterCache: parsed chapters in memory; verse and range lookups are
+        # sliced from the whole chapter, and prefetch_chapter() fills it in the background
+        self.chapter_cache = chapter_cache
+        self._prefetches = {}
+        self._prefetcher = None
+        self._prefetch_lock = threading.Lock()
+        # Optional {translation: bible_archive.ArchiveReader}: packed verse texts for verse and range lookups
+        self.archives = archives if archives is not None else {}
+        # Every network request (never a cache or store hit) takes a token from the rate limiter,
+        # shared by all threads using this fetcher. Without one, delay_between_requests is the
+        # starting interval of an AdaptiveRateLimiter that speeds up while the site answers
+        # quickly and backs off when it pushes back; 0 means no pacing at all.
+        if rate_limiter is None and delay_between_requests:
+            rate = 1.0 / delay_between_requests
+            rate_limiter = AdaptiveRateLimiter(rate=rate, min_rate=min(rate, 0.1), max_rate=max(rate, self.DEFAULT_MAX_RATE))
+        self.rate_limiter = rate_limiter
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0}
+        # Per-request timings, bytes, cache/store hits, parse time and sleeps, rolled up per book
+        self.metrics = metrics or FetchMetrics()
+
+    @property
+    def stats(self):
+        """Request, retry and connection-reuse counters for this fetcher."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        opened, pooled_requests = self._connection_counts()
+        stats["connections_opened"] = opened
+        stats["connections_reused"] = max(0, pooled_requests - opened)
+        return stats
+
+    def _connection_counts(self):
+        opened = pooled_requests = 0
+        seen = set()
+        for adapter in self.session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+            if pools is None:
+                continue
+            for key in list(pools.keys()):
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue
+                opened += getattr(pool, "num_connections", 0)
+                pooled_requests += getattr(pool, "num_requests", 0)
+        return opened, pooled_requests
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def close(self):
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=False, cancel_futures=True)
+        if self._sender is not None:
+            self._sender.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
 
     def _build_url(self, book, chapter=None, verse=None, translation=None):
+        """Print-interface URL; translation may be a list of codes for a multi-version page."""
         search = normalize_book_name(book)
         if chapter:
             search += f" {chapter}"
             if verse:
                 search += f":{verse}"
+        if isinstance(translation, (list, tuple)):
+            translation = ";".join(translation)
         params = {
             "search": search,
             "version": translation or "NIV",
@@ -88,143 +277,800 @@ class BibleGatewayFetcher:
         param_str = "&".join([f"{k}={requests.utils.quote(str(v))}" for k, v in params.items()])
         return f"{self.BASE_URL}?{param_str}"
 
-    def _extract_structured(self, html, book=None, chapter=None):
-        soup = BeautifulSoup(html, "html.parser")
+    def _parse(self, html):
+        started = time.perf_counter()
+        soup = BeautifulSoup(html, self.parser, parse_only=PASSAGE_STRAINER if self.passage_only else None)
+        self.metrics.parse(self._current_book(), time.perf_counter() - started)
+        return soup
+
+    def _enter_options(self, token, refresh):
+        # Set this thread's per-call options; returns the previous ones to restore
+        previous = getattr(self._local, "token", None), getattr(self._local, "refresh", None)
+        if token is not None:
+            self._local.token = token
+        if refresh is not None:
+            self._local.refresh = refresh
+        return previous
+
+    def _token(self):
+        return getattr(self._local, "token", None)
+
+    def _refreshing(self):
+        refresh = getattr(self._local, "refresh", None)
+        return self.refresh if refresh is None else refresh
+
+    def _check_token(self):
+        token = self._token()
+        if token is not None:
+            token.check()
+
+    def _current_book(self):
+        # Book of the page this thread is fetching, for per-book metrics
+        return getattr(self._local, "book", None)
+
+    @staticmethod
+    def _find_passage(soup):
         # Try both possible main divs (order: passage-content, then passage-text)
-        content = soup.find("div", class_="passage-content") or soup.find("div", class_="passage-text")
+        return soup.find("div", class_="passage-content") or soup.find("div", class_="passage-text")
+
+    def _passage_content(self, page):
+        soup = self._parse(page) if isinstance(page, str) else page
+        content = self._find_passage(soup)
         if not content:
             # Save HTML for debugging if not found!
             with open("last_failed_passage.html", "w", encoding="utf-8") as f:
-                f.write(html)
+                f.write(page if isinstance(page, str) else str(soup))
             raise Exception("Could not find passage-content or passage-text block in HTML. Saved to last_failed_passage.html")
-        
-        items = []
-        for elem in content.descendants:
-            if isinstance(elem, Tag):
-                # Heading
-                if elem.name in ("h3", "h2") and elem.get_text(strip=True):
-                    items.append({"type": "heading", "text": elem.get_text(strip=True)})
-                # Section Headings
-                elif "section-head" in elem.get("class", []):
-                    items.append({"type": "section", "text": elem.get_text(strip=True)})
-                # Verses (main)
-                elif elem.name == "span" and "text" in elem.get("class", []):
-                    verse_number = None
-                    for cls in elem.get("class", []):
-                        m = re.match(r'([1-3]?[A-Za-z]+(?:-[A-Za-z]+)*)(?:-(\d+))?(?:-(\d+))?', cls)
-                        if m and m.group(3):
-                            verse_number = int(m.group(3))
-                            break
-                    if not verse_number:
-                        if elem.has_attr("data-verse"):
-                            verse_number = int(elem["data-verse"])
-                        else:
-                            prev = elem.find_previous_sibling("sup", class_="versenum")
-                            if prev and prev.get_text(strip=True).isdigit():
-                                verse_number = int(prev.get_text(strip=True))
-                    verse_dict = {
-                        "type": "verse",
-                        "book": book,
-                        "chapter": chapter,
-                        "number": verse_number,
-                        "text": elem.get_text(separator=" ", strip=True)
-                    }
-                    items.append(verse_dict)
-                # Footnotes
-                elif elem.name == "span" and "footnote" in elem.get("class", []):
-                    symbol = elem.get("data-symbol") or elem.get_text(strip=True)
-                    text = ""
-                    note = elem.find("div", class_="footnote-text")
-                    if note:
-                        text = note.get_text(separator=" ", strip=True)
-                    else:
-                        text = elem.get_text(separator=" ", strip=True)
-                    items.append({
-                        "type": "footnote",
-                        "symbol": symbol,
-                        "text": text
-                    })
-                elif elem.name == "p" and elem.get_text(strip=True):
-                    items.append({"type": "paragraph", "text": elem.get_text(separator=" ", strip=True)})
-                elif elem.name == "span" and "crossreference" in elem.get("class", []):
-                    symbol = elem.get("data-symbol") or elem.get_text(strip=True)
-                    text = elem.get_text(separator=" ", strip=True)
-                    items.append({
-                        "type": "crossref",
-                        "symbol": symbol,
-                        "text": text
-                    })
-        clean = []
-        seen = set()
-        for i in items:
-            sig = (i.get("type"), i.get("text"), i.get("number"))
-            if i["type"] == "verse":
-                if not i["text"].strip() or i["text"].startswith("[") or i["number"] is None:
+        return content
+
+    def _extract_structured(self, page, book=None, chapter=None):
+        """Extract items from a page; page is raw HTML or the tree _get_page already parsed."""
+        content = self._passage_content(page)
+        started = time.perf_counter()
+        items = self._clean_items(self._collect_items(content, book, chapter))
+        self.metrics.extract(book, chapter, time.perf_counter() - started, len(items))
+        return items
+
+    def _extract_chapters(self, page, book=None):
+        """Split a multi-chapter page into {chapter: items}, taking each verse's chapter from its Book-C-V class.
+
+        Non-verse items (headings, paragraphs, notes) belong to the chapter of the next verse;
+        trailing ones stay with the last chapter. Each chapter is cleaned on its own so the
+        result matches what single-chapter requests return.
+        """
+        content = self._passage_content(page)
+        started = time.perf_counter()
+        chapters = {}
+        pending = []
+        current = None
+        for item in self._collect_items(content, book, None):
+            if item["type"] == "verse":
+                if item["chapter"] is None:
+                    item["chapter"] = current
+                if item["chapter"] is not None:
+                    current = item["chapter"]
+                    chapters.setdefault(current, []).extend(pending)
+                    chapters[current].append(item)
+                    pending = []
                     continue
-            if sig not in seen:
-                clean.append(i)
-                seen.add(sig)
-        return clean
+            pending.append(item)
+        if pending and current is not None:
+            chapters[current].extend(pending)
+        by_chapter = {ch: self._clean_items(chapters[ch]) for ch in sorted(chapters)}
+        self.metrics.extract(book, f"{min(by_chapter, default='')}-{max(by_chapter, default='')}",
+                             time.perf_counter() - started, sum(len(items) for items in by_chapter.values()))
+        return by_chapter
+
+    def _extract_columns(self, page, book=None, chapter=None):
+        """Split a multi-version page into {translation: items}, one per passage column."""
+        soup = self._parse(page) if isinstance(page, str) else page
+        columns = {}
+        for col in soup.find_all("div", class_="passage-col"):
+            translation = col.get("data-translation")
+            if not translation:
+                translation = next((c[len("version-"):] for c in col.get("class", []) if c.startswith("version-")), None)
+            if translation and self._find_passage(col):
+                columns[translation.upper()] = self._extract_structured(col, book=book, chapter=chapter)
+        return columns
+
+    def _collect_items(self, content, book, chapter):
+        """Raw item walk in document order; when chapter is None each verse takes its chapter from its class.
 
+        One pass over the tree: each text node is stripped once and handed to the item elements
+        open around it (a verse inside a heading feeds both), and an item takes its place when its
+        element opens and its text when it closes. A paragraph is a {"type": "paragraph"} marker
+        ahead of the items it holds, not another copy of their text.
+        """
+        items = []
+        collecting = []         # text parts of every item element open around the current node
+        footnotes = []          # open footnote items, for the first div.footnote-text inside each
+        # Per open element: its children left to walk, the text of the last sup.versenum among
+        # them so far (a verse without a number takes it) and what to do when it closes
+        frames = [[iter(content.contents), None, None]]
+        while frames:
+            frame = frames[-1]
+            node = next(frame[0], None)
+            if node is None:
+                frames.pop()
+                if frame[2] is not None:
+                    self._close_item(frame[2], frames, items, collecting, footnotes)
+                continue
+            if type(node) in _TEXT_TYPES:
+                if collecting:
+                    text = node.strip()
+                    if text:
+                        for parts in collecting:
+                            parts.append(text)
+                continue
+            if not isinstance(node, Tag):
+                continue
+            classes, class_chapter, class_verse = _class_info(tuple(node.get("class") or ()))
+            name = node.name
+            item = None
+            if name in ("h3", "h2"):
+                item = {"type": "heading"}
+            elif "section-head" in classes:
+                item = {"type": "section"}
+            elif name == "span" and "text" in classes:
+                number = class_verse
+                if not number:
+                    if node.has_attr("data-verse"):
+                        number = int(node["data-verse"])
+                    elif frame[1] is not None and frame[1].isdigit():
+                        number = int(frame[1])
+                verse_chapter = chapter if chapter is not None or class_verse is None else class_chapter
+                item = {"type": "verse", "book": book, "chapter": verse_chapter, "number": number}
+            elif name == "span" and "footnote" in classes:
+                item = {"type": "footnote", "symbol": node.get("data-symbol")}
+                footnotes.append(item)
+            elif name == "p":
+                item = {"type": "paragraph"}
+            elif name == "span" and "crossreference" in classes:
+                item = {"type": "crossref", "symbol": node.get("data-symbol")}
+            elif name == "sup" and "versenum" in classes:
+                kind = "versenum"
+            elif name == "div" and "footnote-text" in classes and any("note" not in f for f in footnotes):
+                kind = "note"
+            else:
+                frames.append([iter(node.contents), None, None])
+                continue
+            parts = []
+            if item is not None:
+                kind = len(items)
+                items.append(item)
+            elif kind == "note":
+                for f in footnotes:
+                    f.setdefault("note", parts)
+            collecting.append(parts)
+            frames.append([iter(node.contents), None, (kind, parts, classes)])
+        return [item for item in items if item is not None]
+
+    @staticmethod
+    def _close_item(closing, frames, items, collecting, footnotes):
+        # An element _collect_items collects text for has ended: fill in (or drop) its item
+        kind, parts, classes = closing
+        collecting.pop()
+        if kind == "versenum":
+            frames[-1][1] = "".join(parts)
+            return
+        if kind == "note":
+            return
+        index = kind
+        item = items[index]
+        kind = item["type"]
+        if kind == "heading":
+            if parts:
+                item["text"] = "".join(parts)
+            elif "section-head" in classes:
+                item.update(type="section", text="")
+            else:
+                items[index] = None
+        elif kind == "section":
+            item["text"] = "".join(parts)
+        elif kind == "paragraph":
+            if not parts:
+                items[index] = None
+        else:
+            if kind == "footnote":
+                # Elements close innermost first, so the last open footnote is this one
+                # (remove() would match an equal outer footnote dict instead)
+                footnotes.pop()
+                note = item.pop("note", None)
+            else:
+                note = None
+            if kind != "verse" and not item["symbol"]:
+                item["symbol"] = "".join(parts)
+            item["text"] = " ".join(parts if note is None else note)
+
+    @staticmethod
+    def _clean_items(items):
+        """Drop empty, bracketed and unnumbered verses."""
+        return [i for i in items
+                if i["type"] != "verse" or (i["text"].strip() and not i["text"].startswith("[") and i["number"] is not None)]
+
+    def _archive_verses(self, translation, book, chapter, verse_start, verse_end):
+        archive = self.archives.get(translation)
+        if archive is None or self._refreshing():
+            return None
+        items = archive.verses(book, chapter, verse_start, verse_end)
+        if items:
+            self.metrics.store_hit(book, chapter)
+        return items or None
+
+    @_call_options
     def fetch_verse(self, book, chapter, verse, translation="NIV"):
+        archived = self._archive_verses(translation, book, chapter, verse, verse)
+        if archived is not None:
+            return archived
+        if self.chapter_cache is not None:
+            return self._slice_verses(self.fetch_entire_chapter(book, chapter, translation), verse, verse)
+        if self.store is not None and not self._refreshing():
+            stored = self.store.get_verses(translation, book, chapter, verse)
+            if stored is not None:
+                self.metrics.store_hit(book, chapter)
+                return stored
         url = self._build_url(book, chapter, verse, translation)
-        html = self._get_page(url)
-        items = self._extract_structured(html, book=book, chapter=chapter)
+        soup = self._get_page(url, book)
+        items = self._extract_structured(soup, book=book, chapter=chapter)
         return [item for item in items if item["type"] == "verse" and item.get("number") == int(verse)]
 
+    @_call_options
     def fetch_verse_range(self, book, chapter, verse_start, verse_end, translation="NIV"):
+        archived = self._archive_verses(translation, book, chapter, verse_start, verse_end)
+        if archived is not None:
+            return archived
+        if self.chapter_cache is not None:
+            return self._slice_verses(self.fetch_entire_chapter(book, chapter, translation), verse_start, verse_end)
+        if self.store is not None and not self._refreshing():
+            stored = self.store.get_verses(translation, book, chapter, verse_start, verse_end)
+            if stored is not None:
+                self.metrics.store_hit(book, chapter)
+                return stored
         url = self._build_url(book, chapter, f"{verse_start}-{verse_end}", translation)
-        html = self._get_page(url)
-        items = self._extract_structured(html, book=book, chapter=chapter)
+        soup = self._get_page(url, book)
+        items = self._extract_structured(soup, book=book, chapter=chapter)
         return [item for item in items if item["type"] == "verse" and verse_start <= item["number"] <= verse_end]
 
+    @staticmethod
+    def _slice_verses(items, verse_start, verse_end):
+        verse_start, verse_end = int(verse_start), int(verse_end)
+        return [item for item in items if item["type"] == "verse" and item.get("number") is not None
+                and verse_start <= item["number"] <= verse_end]
+
+    @_call_options
     def fetch_entire_chapter(self, book, chapter, translation="NIV"):
+        self._await_prefetch(translation, book, chapter)
+        return self._fetch_chapter(book, chapter, translation)
+
+    def _fetch_chapter(self, book, chapter, translation):
+        if self.streaming:
+            return list(self._iter_chapter(book, chapter, translation))
+        cached = self._cached_chapter(translation, book, chapter)
+        if cached is not None:
+            return cached
+        if self.store is not None and not self._refreshing():
+            stored = self.store.get_chapter(translation, book, chapter)
+            if stored is not None:
+                self.metrics.store_hit(book, chapter)
+                self._remember_chapter(translation, book, chapter, stored)
+                return stored
+        url = self._build_url(book, chapter, translation=translation)
+        soup = self._get_page(url, book)
+        items = self._extract_structured(soup, book=book, chapter=chapter)
+        self._store_chapter(translation, book, chapter, items)
+        return items
+
+    def iter_chapter(self, book, chapter, translation="NIV", token=None, refresh=None):
+        """Yield a chapter's items while its page downloads; same items as fetch_entire_chapter.
+
+        The page is scanned as it arrives and each heading/paragraph/verse element is parsed
+        as soon as it closes, so the first verses come out after the first chunk. Reading stops
+        at the end of the passage; chapter cache, store and cache hits are yielded straight away.
+        With a token the download is checked between chunks and can be paused or canceled;
+        refresh overrides the fetcher's setting as for the fetch methods.
+        """
+        self._await_prefetch(translation, book, chapter)
+        items = self._iter_chapter(book, chapter, translation)
+        return items if token is None and refresh is None else self._iter_with_options(items, token, refresh)
+
+    def _iter_with_options(self, items, token, refresh):
+        # The options are this thread's only while the generator runs, not between the items it yields
+        while True:
+            previous = self._enter_options(token, refresh)
+            try:
+                item = next(items, _END)
+            finally:
+                self._local.token, self._local.refresh = previous
+            if item is _END:
+                return
+            yield item
+
+    def _iter_chapter(self, book, chapter, translation):
+        cached = self._cached_chapter(translation, book, chapter)
+        if cached is not None:
+            yield from cached
+            return
+        if self.store is not None and not self._refreshing():
+            stored = self.store.get_chapter(translation, book, chapter)
+            if stored is not None:
+                self.metrics.store_hit(book, chapter)
+                self._remember_chapter(translation, book, chapter, stored)
+                yield from stored
+                return
         url = self._build_url(book, chapter, translation=translation)
-        html = self._get_page(url)
-        return self._extract_structured(html, book=book, chapter=chapter)
+        items = []
+        for item in self._stream_page(url, book, chapter):
+            items.append(item)
+            yield item
+        self._store_chapter(translation, book, chapter, items)
+
+    # --- Parsed-chapter cache and prefetch ---
+    def _cached_chapter(self, translation, book, chapter):
+        if self.chapter_cache is None or self._refreshing():
+            return None
+        items = self.chapter_cache.get(translation, book, chapter)
+        if items is not None:
+            self.metrics.chapter_hit(book, chapter)
+        return items
+
+    def _remember_chapter(self, translation, book, chapter, items):
+        if self.chapter_cache is not None and any(x["type"] == "verse" for x in items):
+            self.chapter_cache.put(translation, book, chapter, items)
+
+    def prefetch_chapter(self, book, chapter, translation="NIV"):
+        """Fetch a chapter into the chapter cache on a background thread, e.g. the next one while
+        the current one is being read. Returns the future, or None if there is nothing to do."""
+        key = (translation, book, int(chapter))
+        if self.chapter_cache is None or key[2] not in chapter_numbers(book, translation) or key in self.chapter_cache:
+            return None
+        with self._prefetch_lock:
+            if key in self._prefetches:
+                return self._prefetches[key]
+            if self._prefetcher is None:
+                self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+            future = self._prefetches[key] = self._prefetcher.submit(self._prefetch, key)
+        return future
+
+    def _prefetch(self, key):
+        translation, book, chapter = key
+        try:
+            self._fetch_chapter(book, chapter, translation)
+        except Exception as e:
+            log.debug("Prefetch of %s %s (%s) failed: %s", book, chapter, translation, e)
+        finally:
+            with self._prefetch_lock:
+                self._prefetches.pop(key, None)
+
+    def _await_prefetch(self, translation, book, chapter):
+        # A chapter being prefetched is waited for rather than requested a second time
+        with self._prefetch_lock:
+            future = self._prefetches.get((translation, book, int(chapter)))
+        if future is not None:
+            future.result()
 
-    def fetch_entire_book(self, book, translation="NIV"):
+    @_call_options
+    def fetch_chapter_span(self, book, first_chapter, last_chapter, translation="NIV"):
+        """Fetch chapters first..last in one request ("Genesis 1-5"); returns {chapter: items}."""
+        if first_chapter == last_chapter:
+            return {first_chapter: self.fetch_entire_chapter(book, first_chapter, translation)}
+        if self.chapter_cache is not None and not self._refreshing():
+            cached = {ch: self.chapter_cache.get(translation, book, ch) for ch in range(first_chapter, last_chapter+1)}
+            if all(items is not None for items in cached.values()):
+                self.metrics.chapter_hit(book, f"{first_chapter}-{last_chapter}")
+                return cached
+        if self.store is not None and not self._refreshing():
+            stored = {ch: self.store.get_chapter(translation, book, ch) for ch in range(first_chapter, last_chapter+1)}
+            if all(items is not None for items in stored.values()):
+                self.metrics.store_hit(book, f"{first_chapter}-{last_chapter}")
+                return stored
+        url = self._build_url(book, f"{first_chapter}-{last_chapter}", translation=translation)
+        soup = self._get_page(url, book)
+        by_chapter = self._extract_chapters(soup, book=book)
+        for chapter, items in by_chapter.items():
+            self._store_chapter(translation, book, chapter, items)
+        return by_chapter
+
+    @_call_options
+    def fetch_parallel_chapter(self, book, chapter, translations):
+        """Fetch a chapter in several translations with one multi-version request.
+
+        Returns {translation: items} in the order asked for; every verse gets a "translation" field.
+        Translations already in the store are not requested again.
+        """
+        translations = list(dict.fromkeys(translations))
+        unknown = [tr for tr in translations if tr not in TRANSLATION_CODES]
+        if unknown:
+            raise Exception(f"Unknown translation(s): {', '.join(unknown)}")
+        results = {}
+        if self.store is not None and not self._refreshing():
+            for tr in translations:
+                stored = self.store.get_chapter(tr, book, chapter)
+                if stored is not None:
+                    self.metrics.store_hit(book, chapter)
+                    results[tr] = stored
+        missing = [tr for tr in translations if tr not in results]
+        if len(missing) == 1:
+            results[missing[0]] = self.fetch_entire_chapter(book, chapter, missing[0])
+        elif missing:
+            url = self._build_url(book, chapter, translation=missing)
+            soup = self._get_page(url, book)
+            columns = self._extract_columns(soup, book=book, chapter=chapter)
+            if not columns:
+                raise Exception(f"No translation columns found for {book} {chapter} ({', '.join(missing)})")
+            for tr in missing:
+                results[tr] = columns.get(tr.upper(), [])
+                self._store_chapter(tr, book, chapter, results[tr])
+        for tr in translations:
+            for item in results[tr]:
+                if item["type"] == "verse":
+                    item["translation"] = tr
+        return {tr: results[tr] for tr in translations}
+
+    @_call_options
+    def fetch_references(self, references, translation="NIV", chapters_per_request=5):
+        """Resolve a reference list with as few page fetches as possible.
+
+        references is free text ("Jn 3:16; Rom 8:28-30, 38") or bible_refs.Reference objects.
+        Every chapter needed is fetched once (neighbouring chapters of a book share one span
+        request, up to chapters_per_request) and each reference is sliced from it.
+        Returns [(reference, items)] in the order given, duplicates dropped.
+        """
+        from bible_refs import chapter_runs, chapters_needed, parse_references
+        if isinstance(references, str):
+            references = parse_references(references)
+        references = list(dict.fromkeys(references))
+        chapters = {}
+        for book, numbers in chapters_needed(references).items():
+            for run in chapter_runs(numbers, max(1, chapters_per_request)):
+                for chapter, items in self.fetch_chapter_batch(book, run, translation).items():
+                    chapters[(book, chapter)] = items
+        return [(ref, ref.slice(chapters.get((ref.book, ref.chapter), []))) for ref in references]
+
+    def _store_chapter(self, translation, book, chapter, items):
+        # Only complete chapters with real verses; a failed page must not shadow the network later
+        self._remember_chapter(translation, book, chapter, items)
+        if self.store is not None and any(x["type"] == "verse" for x in items):
+            self.store.ingest_chapter(translation, book, chapter, items)
+
+    @_call_options
+    def fetch_entire_book(self, book, translation="NIV", chapters_per_request=1):
+        # Request exactly the chapters the versification table knows about;
+        # only books missing from it fall back to probing up to MAX_CHAPTERS.
+        known = chapter_numbers(book, translation)
+        if known and chapters_per_request > 1:
+            return self._fetch_book_batched(book, known, translation, chapters_per_request)
         all_items = []
         consecutive_failures = 0
-        for chapter in range(1, self.MAX_CHAPTERS+1):
-            try:
-                ch_items = self.fetch_entire_chapter(book, chapter, translation)
-                verse_count = sum(1 for x in ch_items if x["type"] == "verse")
-                if verse_count == 0:
+        chapters = known or range(1, self.MAX_CHAPTERS+1)
+        try:
+            for chapter in chapters:
+                self._check_token()
+                try:
+                    ch_items = self.fetch_entire_chapter(book, chapter, translation)
+                    verse_count = sum(1 for x in ch_items if x["type"] == "verse")
+                    if verse_count == 0:
+                        consecutive_failures += 1
+                        if consecutive_failures >= 3:
+                            break
+                    else:
+                        consecutive_failures = 0
+                        all_items.extend(ch_items)
+                except Exception as e:
+                    log.warning("Failed to fetch %s %s: %s", book, chapter, e)
                     consecutive_failures += 1
                     if consecutive_failures >= 3:
                         break
-                else:
-                    consecutive_failures = 0
-                    all_items.extend(ch_items)
-            except Exception as e:
-                print(f"Failed to fetch {book} {chapter}: {e}")
-                consecutive_failures += 1
-                if consecutive_failures >= 3:
-                    break
-            time.sleep(self.delay)
+        except Canceled as e:
+            e.partial = all_items
+            raise
         return all_items
 
-    def _get_page(self, url):
-        print("Fetching URL:", url)
-        resp = requests.get(url, headers=self.headers)
+    @_call_options
+    def fetch_chapter_batch(self, book, chapters, translation="NIV"):
+        """Fetch consecutive chapters with one span request; {chapter: items} for every chapter asked for.
+
+        Chapters missing from the span (truncated or failed) are re-requested one at a time;
+        a chapter that still fails maps to an empty list.
+        """
+        self._check_token()
+        try:
+            by_chapter = self.fetch_chapter_span(book, chapters[0], chapters[-1], translation)
+        except Exception as e:
+            log.warning("Failed to fetch %s %s-%s: %s", book, chapters[0], chapters[-1], e)
+            by_chapter = {}
+        result = {}
+        try:
+            for chapter in chapters:
+                ch_items = by_chapter.get(chapter, [])
+                if not ch_items and len(chapters) > 1:
+                    # Span came back truncated or failed: ask for this chapter alone
+                    self._check_token()
+                    try:
+                        ch_items = self.fetch_entire_chapter(book, chapter, translation)
+                    except Exception as e:
+                        log.warning("Failed to fetch %s %s: %s", book, chapter, e)
+                        ch_items = []
+                result[chapter] = ch_items
+        except Canceled as e:
+            # Chapters of the span that did arrive are kept for the caller to checkpoint
+            e.partial = {chapter: items for chapter, items in {**by_chapter, **result}.items() if chapter in chapters and items}
+            raise
+        return result
+
+    def _fetch_book_batched(self, book, chapters, translation, chapters_per_request):
+        all_items = []
+        consecutive_failures = 0
+        try:
+            for start in range(0, len(chapters), chapters_per_request):
+                batch = chapters[start:start+chapters_per_request]
+                for chapter, ch_items in self.fetch_chapter_batch(book, batch, translation).items():
+                    if any(x["type"] == "verse" for x in ch_items):
+                        consecutive_failures = 0
+                        all_items.extend(ch_items)
+                    else:
+                        consecutive_failures += 1
+                        if consecutive_failures >= 3:
+                            return all_items
+        except Canceled as e:
+            e.partial = all_items + [x for items in (e.partial or {}).values() for x in items]
+            raise
+        return all_items
+
+    def _request(self, url, stream=False, headers=None):
+        """GET through the pooled session, retrying 429/5xx and connection errors with exponential backoff.
+
+        A Retry-After header sets the minimum wait. Every answer is reported to the rate
+        limiter, which paces the next requests from it.
+
+        With stream=True a successful response comes back with its body unread; the caller
+        reads it and records the request with _record_streamed. headers are sent on top of
+        the session's (the conditional headers of a revalidation).
+
+        Under a CancelToken every wait is cancellable and a request in flight is given up as
+        soon as the token is paused or canceled; after a pause it is sent again.
+        """
+        book = self._current_book()
+        token = self._token()
+        attempt = 0
+        while True:
+            if token is not None:
+                token.check()
+            if self.rate_limiter is not None:
+                self.metrics.sleep(book, self.rate_limiter.acquire(sleep=token and token.sleep), "rate_limit")
+            started = time.perf_counter()
+            try:
+                resp, phases = self._send(url, stream, headers, token)
+            except _Abandoned:
+                continue    # paused or canceled mid-request: the check above waits or raises; not counted
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._count("requests")
+                error, phases = e, e.phases
+                self.metrics.request(url, book, None, 0, phases["dns"], phases["connect"],
+                                     max(0.0, time.perf_counter() - started - phases["dns"] - phases["connect"]), 0.0)
+            else:
+                self._count("requests")
+                # elapsed runs to the parsed headers; the rest of the call is reading the body
+                total = time.perf_counter() - started
+                headers_at = min(resp.elapsed.total_seconds(), total)
+                if resp.status_code not in self.RETRY_STATUSES and self.rate_limiter is not None:
+                    self.rate_limiter.on_success(headers_at)
+                if stream and resp.status_code not in self.RETRY_STATUSES:
+                    self._local.streamed = (phases, headers_at)
+                    return resp
+                self.metrics.request(url, book, resp.status_code, len(resp.content), phases["dns"], phases["connect"],
+                                     max(0.0, headers_at - phases["dns"] - phases["connect"]), total - headers_at)
+                if resp.status_code not in self.RETRY_STATUSES:
+                    return resp
+                error = None
+            retry_after = self._retry_after(resp) if error is None else None
+            if self.rate_limiter is not None:
+                rate = self.rate_limiter.on_backoff(retry_after)
+                log.info("Server pushed back (%s); pacing at %.2f req/s", error or f"status {resp.status_code}", rate)
+            if attempt >= self.max_retries:
+                self._count("failures")
+                self.metrics.failure(url, book, error or f"status {resp.status_code}")
+                if error is not None:
+                    raise error
+                return resp
+            attempt += 1
+            self._count("retries")
+            wait = max(self.backoff_factor * (2 ** (attempt - 1)), retry_after or 0)
+            self.metrics.retry(url, book, attempt, wait, error or f"status {resp.status_code}")
+            (token.sleep if token is not None else time.sleep)(wait)
+
+    def _send(self, url, stream, headers, token):
+        """One session.get; (response, DNS/connect phases). Connection errors carry their phases.
+
+        Without a token the call is made on this thread. With one it runs on the fetcher's
+        sender pool while this one polls the token, and _Abandoned is raised once the token is
+        paused or canceled. An abandoned request still queued is dropped; one already sent
+        finishes (or times out) on its pool thread and its response is closed, so abandoned
+        requests never hold more threads or connections than the pool has.
+        """
+        def get():
+            phases = begin_request_timing()
+            try:
+                return self.session.get(url, timeout=self.timeout, stream=stream, headers=headers), phases
+            except (requests.ConnectionError, requests.Timeout) as e:
+                e.phases = phases
+                raise
+
+        if token is None:
+            return get()
+        with self._sender_lock:
+            if self._sender is None:
+                self._sender = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="request")
+        future = self._sender.submit(get)
+        while True:
+            try:
+                future.exception(timeout=token.POLL)
+                break
+            except FutureTimeout:
+                if token.interrupted:
+                    if not future.cancel():
+                        future.add_done_callback(_close_abandoned)
+                    raise _Abandoned()
+        return future.result()
+
+    def _revalidation(self, url):
+        """(cached html, conditional headers) when the cache holds validators for url, else (None, None).
+
+        Only reached when the page was not served from the cache, so the entry is either
+        being refreshed or past its TTL; both are revalidated rather than downloaded again.
+        """
+        if self.cache is None:
+            return None, None
+        entry = self.cache.entry(url)
+        if entry is None:
+            return None, None
+        html, etag, last_modified = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return (html, headers) if headers else (None, None)
+
+    @staticmethod
+    def _validators(resp):
+        return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+    def _retry_after(self, resp):
+        """Seconds from a Retry-After header (delta-seconds or HTTP date), capped at MAX_RETRY_AFTER; None if absent."""
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(seconds, 0.0), self.MAX_RETRY_AFTER)
+
+    def _record_streamed(self, url, book, resp, download):
+        phases, headers_at = self._local.streamed
+        self.metrics.request(url, book, resp.status_code, resp.raw.tell(), phases["dns"], phases["connect"],
+                             max(0.0, headers_at - phases["dns"] - phases["connect"]), download)
+
+    def _stream_page(self, url, book, chapter):
+        """Yield the cleaned items of a passage page as it downloads (cache first, like _get_page)."""
+        self._local.book = book
+        if self.cache is not None and (not self._refreshing() or self.offline):
+            html = self.cache.get(url)
+            self.metrics.cache(url, book, html is not None)
+            if html is not None:
+                yield from self._extract_structured(self._parse(html), book=book, chapter=chapter)
+                return
+        if self.offline:
+            raise Exception(f"Offline mode: page not in cache: {url}")
+        log.debug("Streaming URL: %s", url)
+        cached, headers = self._revalidation(url)
+        resp = self._request(url, stream=True, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            self._record_streamed(url, book, resp, 0.0)
+            resp.close()
+            self.cache.touch(url)
+            self.metrics.cache(url, book, True)
+            yield from self._extract_structured(self._parse(cached), book=book, chapter=chapter)
+            return
+        validators = self._validators(resp)
+        try:
+            if resp.status_code != 200:
+                raise Exception(f"Error fetching page: {url} (status {resp.status_code})")
+            resp.encoding = resp.encoding or "utf-8"
+            scanner = PassageScanner(keep_html=self.cache is not None)
+            chunks = resp.iter_content(self.STREAM_CHUNK_SIZE, decode_unicode=True)
+            download = parse = extract = 0.0
+            count = 0
+            token = self._token()
+            while not scanner.done:
+                if token is not None:
+                    token.check()
+                started = time.perf_counter()
+                chunk = next(chunks, None)
+                download += time.perf_counter() - started
+                started = time.perf_counter()
+                fragments = scanner.feed(chunk) if chunk is not None else scanner.close()
+                # This chunk's item elements parsed together; the div keeps lxml from wrapping inline ones in a <p>
+                tree = BeautifulSoup(f"<div>{''.join(fragments)}</div>", self.parser) if fragments else None
+                parse += time.perf_counter() - started
+                started = time.perf_counter()
+                items = self._clean_items(self._collect_items(tree, book, chapter)) if tree is not None else []
+                extract += time.perf_counter() - started
+                count += len(items)
+                yield from items
+                if chunk is None:
+                    break
+            length = resp.headers.get("Content-Length")
+            if scanner.done and length and int(length) - resp.raw.tell() <= self.STREAM_DRAIN_BYTES:
+                # Read (without parsing) a short tail so the keep-alive connection can be reused
+                started = time.perf_counter()
+                for rest in chunks:
+                    scanner.keep_tail(rest)
+                download += time.perf_counter() - started
+            self._record_streamed(url, book, resp, download)
+        finally:
+            resp.close()
+        self.metrics.parse(book, parse)
+        if not scanner.found:
+            # Not a passage (a search page to follow, or an error page): the usual whole-page path
+            html, soup = self._follow_search(scanner.html, self._parse(scanner.html))
+            if self.cache is not None and self._find_passage(soup):
+                self.cache.put(url, html)   # a followed search result: no validators of its own
+            yield from self._extract_structured(soup, book=book, chapter=chapter)
+            return
+        self.metrics.extract(book, chapter, extract, count)
+        if self.cache is not None:
+            self.cache.put(url, scanner.html, **validators)
+
+    def _get_page(self, url, book=None):
+        """Return the parsed tree for url; each page is parsed exactly once and handed to _extract_structured."""
+        self._local.book = book
+        if self.cache is not None and (not self._refreshing() or self.offline):
+            html = self.cache.get(url)
+            self.metrics.cache(url, book, html is not None)
+            if html is not None:
+                return self._parse(html)
+        if self.offline:
+            raise Exception(f"Offline mode: page not in cache: {url}")
+        html, soup, validators = self._download_page(url)
+        # Only cache real passages, never a search page we failed to follow
+        if self.cache is not None and validators is not None and self._find_passage(soup):
+            self.cache.put(url, html, **validators)
+        return soup
+
+    def _download_page(self, url):
+        """(html, tree, validators) for url; validators is None when the cached page was revalidated (304)."""
+        log.debug("Fetching URL: %s", url)
+        cached, headers = self._revalidation(url)
+        resp = self._request(url, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            self.metrics.cache(url, self._current_book(), True)
+            return cached, self._parse(cached), None
         if resp.status_code != 200:
             raise Exception(f"Error fetching page: {url} (status {resp.status_code})")
         html = resp.text
+        page, soup = self._follow_search(html, self._parse(html))
+        # A followed search result is another URL's page: nothing to revalidate it with
+        validators = self._validators(resp) if page is html else {}
+        return page, soup, validators
 
+    def _follow_search(self, html, soup):
         # --- Patch: auto-follow search result if not a direct passage ---
-        soup = BeautifulSoup(html, "html.parser")
-        passage_text = soup.find("div", class_="passage-content") or soup.find("div", class_="passage-text")
+        passage_text = self._find_passage(soup)
         if not passage_text:
             result_list = soup.find("div", class_="search-result-list")
             if result_list:
                 first_link = result_list.find("a", href=True)
                 if first_link:
-                    next_url = "https://www.biblegateway.com" + first_link['href']
-                    print("Auto-following search result:", next_url)
-                    resp2 = requests.get(next_url, headers=self.headers)
+                    next_url = urljoin(self.BASE_URL, first_link['href'])
+                    log.info("Auto-following search result: %s", next_url)
+                    resp2 = self._request(next_url)
                     if resp2.status_code == 200:
-                        return resp2.text
+                        return resp2.text, self._parse(resp2.text)
                     else:
                         raise Exception(f"Error following search result: {next_url} (status {resp2.status_code})")
-        return html
+        return html, soup
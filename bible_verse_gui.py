@@ -2,9 +2,22 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
 import json
+import logging
 import os
+import queue
+import re
 import time
+from collections import deque
 from bible_verse_fetcher import BibleGatewayFetcher, CANONICAL_BOOKS, DEUTERO_BOOKS, TRANSLATION_CODES
+from bible_cache import ChapterCache, ResponseCache
+from bible_compact import CompactPassage
+from bible_versification import chapter_numbers, verse_count
+from bible_ratelimit import AdaptiveRateLimiter
+from bible_refs import parse_references
+from bible_batch import BatchJournal, BatchScheduler
+from bible_export import EXPORT_FORMATS, BatchExporter, write_items
+from bible_store import VerseStore
+from bible_archive import ARCHIVE_EXT, ArchiveReader
 
 BG_COLOR = "#232323"
 FG_COLOR = "#ffffff"
@@ -17,6 +30,32 @@ ERROR_COLOR = "#ff4444"
 BUTTON_BG = "#1a1a1a"
 BUTTON_FG = "#ee4455"
 FONT = ("Consolas", 11)
+# Pacing starts here and adapts to the site's answers, never going above the ceiling
+REQUESTS_PER_SECOND = 1.0
+MAX_REQUESTS_PER_SECOND = 2.0
+# Parsed chapters kept in memory for verse/range lookups and Prev/Next navigation
+CHAPTER_CACHE_BYTES = 16 * 1024 * 1024
+# Output pane: worker threads queue updates; the Tk loop drains them every frame,
+# inserting at most RENDER_CHUNK_LINES per Tk call and keeping at most MAX_OUTPUT_LINES
+UI_POLL_MS = 16
+UI_FRAME_BUDGET = 0.010
+RENDER_CHUNK_LINES = 200
+MAX_OUTPUT_LINES = 5000
+OUTPUT_TAGS = {"heading", "section", "verse", "footnote", "crossref", "paragraph", "error", "default"}
+
+def align_parallel(results):
+    """[(verse number, {translation: text})] in verse order, for a {translation: items} comparison."""
+    rows = {}
+    for translation, items in results.items():
+        for item in items:
+            if item["type"] == "verse":
+                texts = rows.setdefault(item["number"], {})
+                texts[translation] = f"{texts[translation]} {item['text']}" if translation in texts else item["text"]
+    return sorted(rows.items())
+
+def _chapter_list(chapters):
+    # Missing chapters of one book for a message; None stands for a whole probed book
+    return ", ".join("whole book" if chapter is None else f"ch. {chapter}" for chapter in chapters)
 
 def format_item(item):
     if item["type"] == "heading":
@@ -30,7 +69,8 @@ def format_item(item):
     elif item["type"] == "crossref":
         return f'[CROSSREF {item.get("symbol", "")}] {item["text"]}'
     elif item["type"] == "paragraph":
-        return f'[PARAGRAPH] {item["text"]}'
+        # A paragraph break; exports saved before it became a marker still carry the text
+        return f'[PARAGRAPH] {item["text"]}' if item.get("text") else ""
     else:
         return f'[{item["type"].upper()}] {item.get("text","")}'
 
@@ -39,7 +79,11 @@ class BibleGUI:
         self.root = root
         self.root.title("BibleGateway Fetcher - Unified Edition")
         self.root.configure(bg=BG_COLOR)
-        self.fetcher = BibleGatewayFetcher()
+        # One token bucket paces every request (interactive and batch workers alike);
+        # the verse store answers anything already downloaded and backs the search box
+        self.store = VerseStore()
+        self.fetcher = BibleGatewayFetcher(cache=ResponseCache(), rate_limiter=AdaptiveRateLimiter(rate=REQUESTS_PER_SECOND, max_rate=MAX_REQUESTS_PER_SECOND, burst=2), store=self.store,
+                                           chapter_cache=ChapterCache(max_bytes=CHAPTER_CACHE_BYTES))
         self.result_data = None
 
         # --- Interactive Fetch Controls ---
@@ -55,15 +99,18 @@ class BibleGUI:
         # Chapter
         tk.Label(top_frame, text="Chapter:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=0, column=2)
         self.chapter_var = tk.IntVar(value=1)
-        tk.Spinbox(top_frame, from_=1, to=200, textvariable=self.chapter_var, font=FONT, width=5, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR).grid(row=0, column=3, padx=4)
+        self.chapter_spin = tk.Spinbox(top_frame, from_=1, to=200, textvariable=self.chapter_var, font=FONT, width=5, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR)
+        self.chapter_spin.grid(row=0, column=3, padx=4)
 
         # Verse(s)
         tk.Label(top_frame, text="Verse:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=0, column=4)
         self.verse_var = tk.IntVar(value=1)
-        tk.Spinbox(top_frame, from_=1, to=200, textvariable=self.verse_var, font=FONT, width=5, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR).grid(row=0, column=5, padx=4)
+        self.verse_spin = tk.Spinbox(top_frame, from_=1, to=200, textvariable=self.verse_var, font=FONT, width=5, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR)
+        self.verse_spin.grid(row=0, column=5, padx=4)
         tk.Label(top_frame, text="to", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=0, column=6)
         self.verse_end_var = tk.IntVar(value=1)
-        tk.Spinbox(top_frame, from_=1, to=200, textvariable=self.verse_end_var, font=FONT, width=5, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR).grid(row=0, column=7, padx=4)
+        self.verse_end_spin = tk.Spinbox(top_frame, from_=1, to=200, textvariable=self.verse_end_var, font=FONT, width=5, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR)
+        self.verse_end_spin.grid(row=0, column=7, padx=4)
 
         # Translation
         tk.Label(top_frame, text="Translation:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=0, column=8)
@@ -74,17 +121,50 @@ class BibleGUI:
 
         # Fetch Mode
         self.mode_var = tk.StringVar(value="verse")
-        modes = [("Single Verse", "verse"), ("Verse Range", "range"), ("Full Chapter", "chapter"), ("Full Book", "book")]
+        modes = [("Single Verse", "verse"), ("Verse Range", "range"), ("Full Chapter", "chapter"), ("Full Book", "book"), ("Side by Side", "parallel"), ("Reference List", "refs")]
         for idx, (text, val) in enumerate(modes):
             tk.Radiobutton(top_frame, text=text, variable=self.mode_var, value=val, bg=BG_COLOR, fg=BUTTON_FG,
                            selectcolor=BG_COLOR, font=FONT, activeforeground=HEADING_COLOR, activebackground=BG_COLOR).grid(row=1, column=idx, pady=(5,2), sticky="w")
 
         # Fetch Button
-        tk.Button(top_frame, text="Fetch", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=HEADING_COLOR, command=self.start_fetch).grid(row=1, column=5, padx=10, pady=4, sticky="w")
+        tk.Button(top_frame, text="Fetch", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, activebackground=HEADING_COLOR, command=self.start_fetch).grid(row=1, column=6, padx=10, pady=4, sticky="w")
 
         # Copy/Download JSON Buttons
-        tk.Button(top_frame, text="Copy JSON", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.copy_json).grid(row=1, column=6, padx=6)
-        tk.Button(top_frame, text="Download JSON", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.save_json).grid(row=1, column=7, padx=6)
+        tk.Button(top_frame, text="Copy JSON", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.copy_json).grid(row=1, column=7, padx=6)
+        tk.Button(top_frame, text="Download JSON", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.save_json).grid(row=1, column=8, padx=6)
+
+        # Side by Side: one chapter in several translations, fetched as a single multi-version page
+        tk.Label(top_frame, text="Compare:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=2, column=0, sticky="w")
+        self.compare_var = tk.StringVar(value="KJV, ASV, WEB")
+        tk.Entry(top_frame, textvariable=self.compare_var, font=FONT, width=30, bg="#181818", fg="#e6e6e6", insertbackground=FG_COLOR, bd=1).grid(row=2, column=1, columnspan=3, sticky="w", padx=4, pady=(0,4))
+
+        # Previous/next verse, range or chapter; the next chapter is prefetched in the background
+        tk.Button(top_frame, text="◀ Prev", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=lambda: self.step(-1)).grid(row=2, column=6, padx=6, pady=(0,4))
+        tk.Button(top_frame, text="Next ▶", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=lambda: self.step(1)).grid(row=2, column=7, padx=6, pady=(0,4))
+
+        # Reference List: free-text references, each needed chapter fetched once
+        tk.Label(top_frame, text="References:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=3, column=0, sticky="w")
+        self.refs_var = tk.StringVar(value="Jn 3:16; Rom 8:28-30, 38")
+        tk.Entry(top_frame, textvariable=self.refs_var, font=FONT, width=70, bg="#181818", fg="#e6e6e6", insertbackground=FG_COLOR, bd=1).grid(row=3, column=1, columnspan=8, sticky="w", padx=4, pady=(0,4))
+
+        # Offline: answer from the local page cache only
+        self.offline_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(top_frame, text="Offline (cache only)", variable=self.offline_var, command=self.update_offline_mode,
+                       bg=BG_COLOR, fg=FG_COLOR, selectcolor=BG_COLOR, font=FONT, activebackground=BG_COLOR).grid(row=1, column=9, columnspan=2, sticky="w")
+
+        # --- Full-text search over everything downloaded (local store, no scraping) ---
+        search_frame = tk.LabelFrame(root, text="Search Downloaded Text", bg=BG_COLOR, fg=HEADING_COLOR, font=(FONT[0], FONT[1]+1, "bold"))
+        search_frame.pack(fill=tk.X, padx=12, pady=(4, 0))
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var, font=FONT, width=48, bg="#181818", fg="#e6e6e6", insertbackground=FG_COLOR, bd=1)
+        search_entry.grid(row=0, column=0, padx=4, pady=4)
+        search_entry.bind("<Return>", lambda event: self.do_search())
+        self.search_translation = tk.StringVar(value="All")
+        ttk.Combobox(search_frame, textvariable=self.search_translation, values=["All"] + list(TRANSLATION_CODES.keys()), font=FONT, width=8, state="readonly").grid(row=0, column=1, padx=4)
+        tk.Button(search_frame, text="Search", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.do_search).grid(row=0, column=2, padx=4)
+        tk.Button(search_frame, text="Import Files…", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.import_files).grid(row=0, column=3, padx=4)
+        tk.Button(search_frame, text="Open Archive…", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.open_archives).grid(row=0, column=4, padx=4)
+        tk.Label(search_frame, text='words, or "an exact phrase"', bg=BG_COLOR, fg=PARAGRAPH_COLOR, font=FONT).grid(row=0, column=5, padx=4, sticky="w")
 
         # --- Divider ---
         tk.Label(root, text=" ", bg=BG_COLOR).pack(pady=2)
@@ -138,6 +218,30 @@ class BibleGUI:
         self.status_label = tk.Label(batch_frame, text="Ready.", bg=BG_COLOR, fg=PARAGRAPH_COLOR, font=FONT, anchor="w")
         self.status_label.grid(row=4, column=4, columnspan=3, sticky="w")
 
+        # Chapters per request ("Genesis 1-5" style spans, split back per chapter)
+        tk.Label(batch_frame, text="Chapters/request:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=1, column=2, sticky="w", padx=(12,0))
+        self.chapters_per_request = tk.IntVar(value=5)
+        tk.Spinbox(batch_frame, from_=1, to=10, textvariable=self.chapters_per_request, font=FONT, width=4, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR).grid(row=1, column=3, sticky="w", padx=(2,0))
+
+        # Parallel workers (all share the fetcher's rate limiter)
+        tk.Label(batch_frame, text="Workers:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=2, column=2, sticky="w", padx=(12,0))
+        self.batch_workers = tk.IntVar(value=4)
+        tk.Spinbox(batch_frame, from_=1, to=8, textvariable=self.batch_workers, font=FONT, width=4, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR).grid(row=2, column=3, sticky="w", padx=(2,0))
+
+        # Export format: pretty JSON (converted at the end), JSON Lines, or gzipped JSON Lines
+        tk.Label(batch_frame, text="Format:", bg=BG_COLOR, fg=FG_COLOR, font=FONT).grid(row=3, column=2, sticky="w", padx=(12,0))
+        self.export_format = tk.StringVar(value="json")
+        ttk.Combobox(batch_frame, textvariable=self.export_format, values=list(EXPORT_FORMATS.keys()), font=FONT, width=8, state="readonly").grid(row=3, column=3, sticky="w", padx=(2,0))
+        self.export_combined = tk.BooleanVar(value=False)
+        tk.Checkbutton(batch_frame, text="One file per translation", variable=self.export_combined,
+                       bg=BG_COLOR, fg=FG_COLOR, selectcolor=BG_COLOR, font=FONT, activebackground=BG_COLOR).grid(row=4, column=2, columnspan=2, sticky="w", padx=(12,0))
+        # Refresh: conditional requests against the page cache, and books whose content is unchanged are not re-saved
+        self.batch_refresh = tk.BooleanVar(value=False)
+        tk.Checkbutton(batch_frame, text="Refresh (re-save changed books only)", variable=self.batch_refresh,
+                       bg=BG_COLOR, fg=FG_COLOR, selectcolor=BG_COLOR, font=FONT, activebackground=BG_COLOR).grid(row=5, column=4, columnspan=3, sticky="w", pady=(4,0))
+        # Request/cache/parse metrics of the last batch (or everything since start-up)
+        tk.Button(batch_frame, text="Export Metrics…", font=FONT, bg=BUTTON_BG, fg=BUTTON_FG, command=self.export_metrics).grid(row=5, column=2, columnspan=2, sticky="w", padx=(12,0), pady=(4,0))
+
         # --- Scrolled Text Output Widget ---
         self.text = scrolledtext.ScrolledText(root, font=FONT, bg=BG_COLOR, fg=FG_COLOR, insertbackground=FG_COLOR,
                                               width=110, height=22, wrap=tk.WORD, borderwidth=2, relief=tk.GROOVE)
@@ -151,6 +255,11 @@ class BibleGUI:
         self.text.tag_configure("error", foreground=ERROR_COLOR, font=(FONT[0], FONT[1]+1, "bold"))
         self.text.tag_configure("default", foreground=FG_COLOR)
 
+        # --- UI update queue (the only way worker threads touch widgets) ---
+        self.ui_queue = queue.Queue()
+        self._backlog = deque()
+        self.root.after(UI_POLL_MS, self._drain_ui_queue)
+
         # --- Batch State
         self.batch_thread = None
         self.batch_paused = threading.Event()
@@ -158,11 +267,57 @@ class BibleGUI:
 
         self.update_apocrypha_state()
 
+        # Keep chapter/verse spinboxes inside the versification table
+        for var in (self.book_var, self.translation_var, self.chapter_var):
+            var.trace_add("write", self.update_spin_limits)
+        self.update_spin_limits()
+
     def pick_folder(self):
         folder = filedialog.askdirectory(initialdir=self.save_folder.get() or os.getcwd())
         if folder:
             self.save_folder.set(folder)
 
+    @staticmethod
+    def _clamp(var, low, high):
+        try:
+            value = int(var.get())
+        except (tk.TclError, ValueError):
+            return None
+        if value < low or value > high:
+            value = min(max(value, low), high)
+            var.set(value)
+        return value
+
+    def update_spin_limits(self, *args):
+        book = self.book_var.get()
+        translation = self.translation_var.get()
+        chapters = chapter_numbers(book, translation)
+        if chapters:
+            self.chapter_spin.config(from_=chapters[0], to=chapters[-1])
+            chapter = self._clamp(self.chapter_var, chapters[0], chapters[-1])
+        else:
+            self.chapter_spin.config(from_=1, to=BibleGatewayFetcher.MAX_CHAPTERS)
+            chapter = None
+        max_verse = (verse_count(book, chapter, translation) if chapter else None) or BibleGatewayFetcher.MAX_VERSES
+        for spin, var in ((self.verse_spin, self.verse_var), (self.verse_end_spin, self.verse_end_var)):
+            spin.config(to=max_verse)
+            self._clamp(var, 1, max_verse)
+
+    def _chapters_per_request(self):
+        try:
+            return max(1, int(self.chapters_per_request.get()))
+        except (tk.TclError, ValueError):
+            return 1
+
+    def _batch_workers(self):
+        try:
+            return max(1, int(self.batch_workers.get()))
+        except (tk.TclError, ValueError):
+            return 1
+
+    def update_offline_mode(self):
+        self.fetcher.offline = self.offline_var.get()
+
     def update_apocrypha_state(self, event=None):
         # For both single and batch modes
         tr_code = self.translation_var.get()
@@ -183,54 +338,254 @@ class BibleGUI:
                     break
 
     # --- Interactive Fetch Methods ---
+    def step(self, delta):
+        """Move to the previous/next verse (Single Verse), range of the same width (Verse Range) or chapter, and fetch it."""
+        try:
+            book, chapter = self.book_var.get(), int(self.chapter_var.get())
+            verse, verse_end = int(self.verse_var.get()), int(self.verse_end_var.get())
+        except (tk.TclError, ValueError):
+            return
+        translation, mode = self.translation_var.get(), self.mode_var.get()
+        chapters = chapter_numbers(book, translation) or [chapter]
+        if mode in ("verse", "range"):
+            width = max(1, verse_end - verse + 1) if mode == "range" else 1
+            verse += delta * width
+            if verse > (verse_count(book, chapter, translation) or verse):
+                if chapter >= chapters[-1]:
+                    return
+                chapter, verse = chapter + 1, 1
+            elif verse < 1:
+                if chapter <= chapters[0]:
+                    return
+                chapter -= 1
+                verse = max(1, (verse_count(book, chapter, translation) or width) - width + 1)
+            self.verse_var.set(verse)
+            self.verse_end_var.set(verse + width - 1)
+        else:
+            if not chapters[0] <= chapter + delta <= chapters[-1]:
+                return
+            chapter += delta
+        self.chapter_var.set(chapter)
+        self.start_fetch()
+
     def start_fetch(self):
-        threading.Thread(target=self.do_fetch, daemon=True).start()
+        # Read the Tk variables here, on the main thread; the worker only gets plain values
+        try:
+            compare = [code.upper() for code in re.split(r"[\s,;]+", self.compare_var.get()) if code]
+            request = (self.book_var.get(), int(self.chapter_var.get()), int(self.verse_var.get()),
+                       int(self.verse_end_var.get()), self.translation_var.get(), self.mode_var.get(), self._chapters_per_request(), compare,
+                       self.refs_var.get())
+        except (tk.TclError, ValueError) as e:
+            self.post_ui(self._clear_output)
+            self.write_output(f"Error: {str(e)}", "error")
+            return
+        self.post_ui(self._clear_output)
+        self.write_output("Fetching...\n", "section")
+        threading.Thread(target=self.do_fetch, args=request, daemon=True).start()
 
-    def do_fetch(self):
-        self.text.configure(state=tk.NORMAL)
-        self.text.delete(1.0, tk.END)
-        self.text.insert(tk.END, "Fetching...", "section")
-        self.text.update()
+    def do_fetch(self, book, chapter, verse, verse_end, translation, mode, chapters_per_request, compare, refs_text):
         try:
-            book = self.book_var.get()
-            chapter = int(self.chapter_var.get())
-            verse = int(self.verse_var.get())
-            verse_end = int(self.verse_end_var.get())
-            translation = self.translation_var.get()
-            mode = self.mode_var.get()
+            if mode == "refs":
+                errors = []
+                refs = parse_references(refs_text, errors)
+                results = self.fetcher.fetch_references(refs, translation, chapters_per_request=chapters_per_request)
+                self.result_data = CompactPassage([dict(item, reference=str(ref)) for ref, items in results for item in items])
+                self.display_references(results, translation, errors)
+                return
+            if mode == "parallel":
+                results = self.fetcher.fetch_parallel_chapter(book, chapter, compare)
+                self.result_data = CompactPassage([item for items in results.values() for item in items])
+                self.display_parallel(results)
+                return
             if mode == "verse":
                 items = self.fetcher.fetch_verse(book, chapter, verse, translation)
             elif mode == "range":
                 items = self.fetcher.fetch_verse_range(book, chapter, verse, verse_end, translation)
             elif mode == "chapter":
-                items = self.fetcher.fetch_entire_chapter(book, chapter, translation)
+                # Verses appear while the page is still downloading
+                self.result_data = CompactPassage(self.stream_items(self.fetcher.iter_chapter(book, chapter, translation)))
+                self.fetcher.prefetch_chapter(book, chapter + 1, translation)
+                return
             elif mode == "book":
-                items = self.fetcher.fetch_entire_book(book, translation)
+                items = self.fetcher.fetch_entire_book(book, translation, chapters_per_request=chapters_per_request)
             else:
                 raise Exception("Unknown fetch mode")
-            self.result_data = items
-            self.display_result(items)
+            # Kept columnar (about half the memory of the dicts); rebuilt lazily for display and export
+            self.result_data = CompactPassage.from_items(items)
+            self.display_result(self.result_data)
+            if mode in ("verse", "range"):
+                # Next chapter into the chapter cache while this one is read, so "Next" is instant
+                self.fetcher.prefetch_chapter(book, chapter + 1, translation)
         except Exception as e:
             self.result_data = None
-            self.text.delete(1.0, tk.END)
-            self.text.insert(tk.END, f"Error: {str(e)}", "error")
+            self.post_ui(self._clear_output)
+            self.write_output(f"Error: {str(e)}", "error")
 
-    def display_result(self, items):
-        self.text.configure(state=tk.NORMAL)
+    # --- Thread-safe output ---
+    def post_ui(self, func, *args):
+        """Run func(*args) on the Tk thread, in order with the queued output; safe from any thread."""
+        self.ui_queue.put((func, args))
+
+    def write_output(self, text, tag="default"):
+        """Append text to the output pane; safe from any thread."""
+        self.ui_queue.put((None, [(text, tag)]))
+
+    def write_items(self, items):
+        lines = [(format_item(item) + "\n", item["type"] if item["type"] in OUTPUT_TAGS else "default") for item in items]
+        self.ui_queue.put((None, lines))
+
+    def _drain_ui_queue(self):
+        # Spend at most one frame's budget per tick so the window stays responsive
+        deadline = time.perf_counter() + UI_FRAME_BUDGET
+        try:
+            while time.perf_counter() < deadline:
+                if self._backlog:
+                    self._render_chunk()
+                    continue
+                try:
+                    func, args = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if func is None:
+                    self._backlog.extend(args)
+                else:
+                    func(*args)
+        except Exception:
+            logging.getLogger(__name__).exception("UI update failed")
+        finally:
+            self.root.after(UI_POLL_MS, self._drain_ui_queue)
+
+    def _render_chunk(self):
+        # One insert call for the whole chunk: text.insert(index, chars, tags, chars, tags, ...)
+        args = []
+        for _ in range(min(RENDER_CHUNK_LINES, len(self._backlog))):
+            args.extend(self._backlog.popleft())
+        self.text.insert(tk.END, *args)
+        # Only the newest lines stay on screen; result_data still holds everything for Copy/Download JSON
+        excess = int(self.text.index("end-1c").split(".")[0]) - MAX_OUTPUT_LINES
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        self.text.see(tk.END)
+
+    def _clear_output(self):
+        self._backlog.clear()
         self.text.delete(1.0, tk.END)
+
+    # --- Local Search ---
+    def do_search(self):
+        query = self.search_var.get().strip()
+        if not query:
+            return
+        translation = self.search_translation.get()
+        started = time.perf_counter()
+        results = self.store.search(query, translation=None if translation == "All" else translation)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.result_data = results or None
+        self.post_ui(self._clear_output)
+        self.write_output(f"{len(results)} match(es) for {query!r} in {elapsed_ms:.1f} ms\n", "section")
+        self.ui_queue.put((None, [(f'[{item["translation"]} {item.get("book")} {item.get("chapter")}:{item.get("number")}] {item["text"]}\n', "verse")
+                                  for item in results]))
+
+    def import_files(self):
+        paths = filedialog.askopenfilenames(filetypes=[("Saved passages", "*.json *.jsonl *.gz")])
+        imported = []
+        for path in paths:
+            try:
+                imported.append(f"{os.path.basename(path)} ({self.store.import_file(path)})")
+            except Exception as e:
+                messagebox.showerror("Import Failed", f"{path}: {e}")
+        if imported:
+            messagebox.showinfo("Imported", "Added to the local store:\n" + "\n".join(imported))
+
+    def open_archives(self):
+        """Answer verse and range lookups of a translation from a packed archive (memory-mapped, nothing loaded)."""
+        paths = filedialog.askopenfilenames(filetypes=[("Verse archives", "*" + ARCHIVE_EXT)])
+        opened = []
+        for path in paths:
+            try:
+                archive = ArchiveReader(path)
+            except Exception as e:
+                messagebox.showerror("Open Failed", f"{path}: {e}")
+                continue
+            previous = self.fetcher.archives.get(archive.translation)
+            self.fetcher.archives[archive.translation] = archive
+            if previous is not None:
+                previous.close()
+            opened.append(f"{os.path.basename(path)} ({archive.translation}, {len(archive.books)} books)")
+        if opened:
+            messagebox.showinfo("Archives", "Verse lookups now read from:\n" + "\n".join(opened))
+
+    def display_result(self, items):
+        """Replace the output pane with items; safe from any thread."""
+        self.post_ui(self._clear_output)
         if not items:
-            self.text.insert(tk.END, "No results found.", "error")
+            self.write_output("No results found.", "error")
             return
+        self.write_items(items)
+
+    def stream_items(self, items):
+        """Replace the output pane with items from an iterator, shown as they arrive; returns them all. Safe from any thread."""
+        self.post_ui(self._clear_output)
+        received = []
+        shown = 0
+        flushed = time.perf_counter()
         for item in items:
-            out = format_item(item) + "\n"
-            self.text.insert(tk.END, out, item["type"] if self.text.tag_cget(item["type"], "foreground") else "default")
-        self.text.see(tk.END)
+            received.append(item)
+            # One queue entry per UI tick, not per item
+            if time.perf_counter() - flushed >= UI_POLL_MS / 1000:
+                self.write_items(received[shown:])
+                shown = len(received)
+                flushed = time.perf_counter()
+        if shown < len(received):
+            self.write_items(received[shown:])
+        if not received:
+            self.write_output("No results found.", "error")
+        return received
+
+    def export_metrics(self):
+        fname = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("Prometheus text file", "*.prom")])
+        if not fname:
+            return
+        if fname.endswith(".prom"):
+            self.fetcher.metrics.to_prometheus(fname)
+        else:
+            self.fetcher.metrics.to_json(fname)
+        messagebox.showinfo("Saved", f"Metrics saved to {fname}")
+
+    def display_parallel(self, results):
+        """Verse-aligned comparison: each verse number followed by one line per translation; safe from any thread."""
+        self.post_ui(self._clear_output)
+        rows = align_parallel(results)
+        if not rows:
+            self.write_output("No results found.", "error")
+            return
+        width = max(len(tr) for tr in results)
+        lines = []
+        for number, texts in rows:
+            lines.append((f"[VERSE {number}]\n", "section"))
+            lines.extend((f"  {tr:<{width}}  {texts.get(tr, '—')}\n", "verse") for tr in results)
+        self.ui_queue.put((None, lines))
+
+    def display_references(self, results, translation, errors=()):
+        """Each reference as a section line followed by its items; safe from any thread."""
+        self.post_ui(self._clear_output)
+        for error in errors:
+            self.write_output(f"Skipped: {error}\n", "error")
+        if not results:
+            self.write_output("No references found.", "error")
+            return
+        for ref, items in results:
+            self.write_output(f"{ref} ({translation})\n", "section")
+            if items:
+                self.write_items(items)
+            else:
+                self.write_output("Not found.\n", "error")
 
     def copy_json(self):
         if not self.result_data:
             messagebox.showwarning("No Data", "Nothing to copy!")
             return
-        data = json.dumps(self.result_data, ensure_ascii=False, indent=2)
+        data = json.dumps(list(self.result_data), ensure_ascii=False, indent=2)
         self.root.clipboard_clear()
         self.root.clipboard_append(data)
         messagebox.showinfo("Copied", "JSON copied to clipboard!")
@@ -239,11 +594,10 @@ class BibleGUI:
         if not self.result_data:
             messagebox.showwarning("No Data", "Nothing to save!")
             return
-        fname = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files","*.json")])
+        fname = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files","*.json"), ("JSON Lines","*.jsonl"), ("Gzipped JSON Lines","*.jsonl.gz")])
         if not fname:
             return
-        with open(fname, "w", encoding="utf-8") as f:
-            json.dump(self.result_data, f, ensure_ascii=False, indent=2)
+        write_items(fname, self.result_data)
         messagebox.showinfo("Saved", f"JSON saved to {fname}")
 
     # --- Batch Download Methods ---
@@ -266,16 +620,17 @@ class BibleGUI:
         self.progress["value"] = 0
         self.progress["maximum"] = len(books)
         self.status_label.config(text="Starting batch…")
-        self.text.configure(state=tk.NORMAL)
-        self.text.delete(1.0, tk.END)
-        self.text.insert(tk.END, f"Batch started...\n", "section")
+        self.post_ui(self._clear_output)
+        self.write_output(f"Batch started...\n", "section")
         self.batch_paused.clear()
         self.batch_cancel.clear()
         save_folder = self.save_folder.get() or os.getcwd()
         translation = self.batch_translation.get()
+        options = {"workers": self._batch_workers(), "chapters_per_request": self._chapters_per_request(),
+                   "fmt": self.export_format.get(), "combined": self.export_combined.get(), "refresh": self.batch_refresh.get()}
         self.batch_thread = threading.Thread(
             target=self.do_batch_download,
-            args=(books, save_folder, translation),
+            args=(books, save_folder, translation, options),
             daemon=True
         )
         self.batch_thread.start()
@@ -301,45 +656,99 @@ class BibleGUI:
         self.cancel_btn.config(state=tk.DISABLED)
         self.download_btn.config(state=tk.NORMAL)
 
-    def do_batch_download(self, books, save_folder, translation):
-        total = len(books)
+    def _show_progress(self, done, total, status=None):
         self.progress["maximum"] = total
-        for idx, book in enumerate(books):
-            while self.batch_paused.is_set():
-                self.status_label.config(text=f"Paused on {book} ({idx+1}/{total})")
-                time.sleep(0.25)
-                if self.batch_cancel.is_set():
-                    self.status_label.config(text="Batch canceled.")
-                    return
-            if self.batch_cancel.is_set():
-                self.status_label.config(text="Batch canceled.")
-                break
-            self.progress["value"] = idx
-            self.status_label.config(text=f"Fetching: {book} ({idx+1}/{total})")
-            self.text.insert(tk.END, f"Fetching {book} ({translation})...\n", "section")
-            self.text.see(tk.END)
-            self.text.update()
-            try:
-                items = self.fetcher.fetch_entire_book(book, translation)
-                fname = os.path.join(save_folder, f"{book.replace(' ','_')}_{translation}.json")
-                with open(fname, "w", encoding="utf-8") as f:
-                    json.dump(items, f, ensure_ascii=False, indent=2)
-                self.text.insert(tk.END, f"Saved {fname}\n", "paragraph")
-            except Exception as e:
-                self.text.insert(tk.END, f"Failed to fetch/save {book}: {str(e)}\n", "error")
-            self.progress["value"] = idx+1
-            self.text.see(tk.END)
-            self.text.update()
-            self.status_label.config(text=f"Completed: {book} ({idx+1}/{total})")
-            time.sleep(0.5)
-        self.status_label.config(text="Batch done." if not self.batch_cancel.is_set() else "Batch canceled.")
+        self.progress["value"] = done
+        if status and not self.batch_paused.is_set():
+            self.status_label.config(text=status)
+
+    def _finish_batch(self, canceled):
+        self.status_label.config(text="Batch done." if not canceled else "Batch canceled.")
         self.download_btn.config(state=tk.NORMAL)
         self.pause_btn.config(state=tk.DISABLED)
         self.continue_btn.config(state=tk.DISABLED)
         self.cancel_btn.config(state=tk.DISABLED)
-        self.progress["value"] = total
+        if not canceled:
+            self.progress["value"] = self.progress["maximum"]
+
+    def do_batch_download(self, books, save_folder, translation, options):
+        metrics = self.fetcher.metrics
+        metrics.reset()
+        started = time.monotonic()
+
+        def on_progress(done, total, unit):
+            eta = (time.monotonic() - started) / done * (total - done)
+            self.post_ui(self._show_progress, done, total,
+                         f"Fetched {unit.book} ({done}/{total} requests) · "
+                         f"{metrics.requests_per_second():.1f} req/s (pacing {self.fetcher.rate_limiter.rate:.1f}) · ETA {int(eta // 60)}:{int(eta % 60):02d}")
+
+        # Chapters are written as they arrive; nothing holds a whole book in memory
+        exporter = BatchExporter(save_folder, translation, fmt=options["fmt"], combined=options["combined"],
+                                 skip_unchanged=options["refresh"])
+
+        def on_chapter(book, chapter, items):
+            exporter.write_chapter(book, chapter, items)
+
+        def on_book(book, items):
+            metrics.log_book(book)
+            if book in scheduler.missing:
+                # Never save a book with holes; the journal keeps its other chapters for a rerun
+                exporter.abort_book(book)
+                self.write_output(f"Not saved {book}: missing {_chapter_list(scheduler.missing[book])}\n", "error")
+                return
+            try:
+                fname = exporter.finish_book(book)
+                if fname in exporter.unchanged:
+                    self.write_output(f"Unchanged {fname}\n", "paragraph")
+                elif fname:
+                    summary = metrics.book_summary(book)
+                    self.write_output(f"Saved {fname} ({summary['requests']} requests, {summary['bytes'] // 1024} KiB, "
+                                      f"{summary['cache_hits']} cached, {summary['store_hits']} from store)\n", "paragraph")
+            except Exception as e:
+                self.write_output(f"Failed to save {book}: {str(e)}\n", "error")
+
+        def on_error(unit, e):
+            self.write_output(f"Failed to fetch {unit}: {str(e)}\n", "error")
+
+        self.write_output(f"Fetching {len(books)} book(s) ({translation})...\n", "section")
+        # Checkpoint every finished chapter; rerunning the same books/translation resumes here
+        journal = BatchJournal.for_batch(save_folder, books, translation)
+        scheduler = BatchScheduler(
+            self.fetcher, books, translation,
+            workers=options["workers"],
+            chapters_per_request=options["chapters_per_request"],
+            pause_event=self.batch_paused,
+            cancel_event=self.batch_cancel,
+            on_progress=on_progress, on_book=on_book, on_error=on_error, journal=journal,
+            on_chapter=on_chapter, keep_books=False, refresh=options["refresh"])
+        try:
+            if scheduler.run():
+                journal.remove()
+                fname = exporter.finish()
+                if fname:
+                    self.write_output(f"{'Unchanged' if fname in exporter.unchanged else 'Saved'} {fname}\n", "paragraph")
+        except Exception as e:
+            self.write_output(f"Batch failed: {str(e)}\n", "error")
+        finally:
+            exporter.abort()
+        totals = metrics.totals()
+        logging.getLogger(__name__).info("batch_summary %s", totals)
+        self.write_output(f"{totals['requests']} requests in {totals['elapsed_s']:.0f}s ({totals['requests_per_sec'] or 0:.2f} req/s), "
+                          f"{totals['retries']} retries, {totals['rate_limit_sleep']:.0f}s rate-limited.\n", "paragraph")
+        if options["refresh"]:
+            report = exporter.report()
+            self.write_output(f"Refresh: {report['changed']} file(s) changed ({report['changed_chapters']} chapter(s)), "
+                              f"{report['unchanged']} unchanged; {totals['not_modified']} of {totals['requests']} requests "
+                              f"answered 304 Not Modified.\n", "paragraph")
+        if scheduler.missing:
+            self.write_output(f"Missing chapters (download again to fetch them): "
+                              f"{'; '.join(f'{book} {_chapter_list(chapters)}' for book, chapters in scheduler.missing.items())}\n", "error")
+        if scheduler.resumed_chapters:
+            self.write_output(f"Resumed: {scheduler.resumed_chapters} chapter(s) came from the checkpoint journal.\n", "paragraph")
+        self.post_ui(self._finish_batch, self.batch_cancel.is_set())
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     root = tk.Tk()
     style = ttk.Style(root)
     style.theme_use('clam')